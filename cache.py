@@ -0,0 +1,480 @@
+#!/usr/bin/env python
+"""
+cache.py
+Author: Brian Boates
+
+Columnar on-disk cache of built seasons
+
+Each .scores file is parsed and built once; the
+built state is stored as NumPy arrays in
+cache_dir/<season>.<sha1>.npz where sha1 is the
+hash of the .scores file contents: the game
+columns (date, away, home, agoal, hgoal, result,
+ordinal) and, for every team partition, the
+positions of its games and their goals, so a warm
+load restores each TeamSeason with vectorized
+prefix sums instead of inserting game by game.
+Editing a .scores file changes its hash, so the
+stale cache entry is ignored and replaced
+
+FeatureCache stores computed feature columns
+(projections, streaks) per season, checksum and
+parameters so unchanged seasons are not featurized
+again
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import zipfile
+import hashlib
+import tempfile
+import numpy as np
+from classes.game import Game, RESULT_CODES
+from classes.season import Season
+from classes.team_season import LOCATIONS, RESULTS
+from loader import iterRecords, buildSeason, loadSeason, getSeasonFiles
+
+CACHE_DIR = '.cache'
+
+COLUMNS = ['date', 'away', 'home', 'agoal', 'hgoal', 'result']
+DTYPES  = ['S10',  'S3',   'S3',   'i2',    'i2',    'S2']
+
+# team partitions, in the order they are stored
+PARTITIONS = [(location, result) for location in LOCATIONS for result in RESULTS]
+
+# a cache file that cannot be read back is treated as a miss
+LOAD_ERRORS = (IOError, OSError, KeyError, ValueError, zipfile.BadZipfile)
+
+def fileHash(path, block_size=2**20):
+    """
+    return: string | sha1 hex digest of the file contents
+    params:
+              path: string | path to file
+        block_size: int    | bytes read per block
+    """
+    sha1 = hashlib.sha1()
+
+    f = open(path, 'rb')
+    for block in iter(lambda: f.read(block_size), ''):
+        sha1.update(block)
+    f.close()
+
+    return sha1.hexdigest()
+
+
+def cachePath(season_name, digest, cache_dir=CACHE_DIR):
+    """
+    return: string | path of the cache file for a season
+    params:
+      season_name: string | season (e.g. '2005_2006')
+           digest: string | sha1 of the .scores file
+        cache_dir: string | cache directory
+    """
+    return os.path.join(cache_dir, season_name+'.'+digest+'.npz')
+
+
+def makeDirs(directory):
+    """
+    Create directory (and parents) unless it exists, tolerating
+    another process creating it at the same time
+    """
+    try:
+        os.makedirs(directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+
+
+def saveArrays(path, arrays):
+    """
+    Write NumPy arrays to path as an .npz file, through a temporary
+    file in the same directory renamed into place, so readers never
+    see a partly written file
+
+    params:
+          path: string                  | .npz file to write
+        arrays: dict[string:np.array]   | name ---> array
+    """
+    directory = os.path.dirname(path) or '.'
+
+    fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        f = os.fdopen(fd, 'wb')
+        np.savez(f, **arrays)
+        f.close()
+        os.rename(tmp, path)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def saveState(season, path):
+    """
+    Write a built Season to path: its game columns plus the games
+    (as positions in the game store) and goals of every team
+    partition, concatenated in PARTITIONS order per team
+
+    params:
+        season: Season | season built with Season.add_game()
+          path: string | .npz file to write
+    """
+    games = season.games()
+    position = dict((id(g), i) for i, g in enumerate(games))
+
+    records = [(g.date, g.away, g.home, g.away_goals, g.home_goals, g.result) for g in games]
+    columns = zip(*records) if records else [[]]*len(COLUMNS)
+
+    arrays = {}
+    for i, name in enumerate(COLUMNS):
+        arrays[name] = np.array(columns[i], dtype=DTYPES[i])
+    arrays['ordinal'] = np.array([g.ordinal for g in games], dtype=np.int32)
+
+    teams = season.teams()
+    positions, goals_for, goals_against, bounds = [], [], [], [0]
+    for team in teams:
+        state = season.get_team_season(team).get_state()
+        for key in PARTITIONS:
+            partition_games, partition_for, partition_against = state[key]
+            positions.extend(position[id(g)] for g in partition_games)
+            goals_for.extend(partition_for)
+            goals_against.extend(partition_against)
+            bounds.append(len(positions))
+
+    arrays['teams'] = np.array(teams, dtype='S')
+    arrays['positions'] = np.array(positions, dtype=np.int32)
+    arrays['goals_for'] = np.array(goals_for, dtype=np.int16)
+    arrays['goals_against'] = np.array(goals_against, dtype=np.int16)
+    arrays['bounds'] = np.array(bounds, dtype=np.int64)
+
+    saveArrays(path, arrays)
+
+
+def _prefixSums(goals, bounds):
+    """
+    return: list[int], list[int] | per partition, 0 followed by the
+                                   running sums of goals and of j*goals
+                                   (j = index within the partition), so
+                                   partition p is [bounds[p]+p, bounds[p+1]+p+1)
+    params:
+         goals: np.array[int] | goals of all partitions, concatenated
+        bounds: np.array[int] | start of each partition (and the end)
+    """
+    lengths = np.diff(bounds)
+    starts  = np.repeat(bounds[:-1], lengths)
+
+    goals = goals.astype(np.int64)
+
+    cum  = np.cumsum(goals)
+    icum = np.cumsum((np.arange(len(goals)) - starts) * goals)
+
+    # restart the sums at each partition
+    cum  = cum - np.concatenate([[0], cum])[starts]
+    icum = icum - np.concatenate([[0], icum])[starts]
+
+    # leading 0 of each partition
+    return np.insert(cum, bounds[:-1], 0).tolist(), np.insert(icum, bounds[:-1], 0).tolist()
+
+
+def loadState(path, season_name):
+    """
+    return: Season | season restored from a file written by saveState
+    params:
+               path: string | .npz file to read
+        season_name: string | season (e.g. '2005_2006')
+    """
+    data = np.load(path)
+    arrays = dict((name, data[name]) for name in data.files)
+    data.close()
+
+    columns = [arrays[name].tolist() for name in COLUMNS + ['ordinal']]
+
+    games = []
+    for date, away, home, agoal, hgoal, result, ordinal in zip(*columns):
+        g = Game.__new__(Game)
+        g.__setstate__((date, ordinal, away, home, agoal, hgoal, RESULT_CODES[result], None))
+        games.append(g)
+
+    bounds = arrays['bounds']
+    positions = arrays['positions']
+    ordinals = arrays['ordinal'][positions].tolist()
+    goals_for = arrays['goals_for'].tolist()
+    goals_against = arrays['goals_against'].tolist()
+
+    cum_for, icum_for = _prefixSums(arrays['goals_for'], bounds)
+    cum_against, icum_against = _prefixSums(arrays['goals_against'], bounds)
+
+    partition_games = map(games.__getitem__, positions.tolist())
+
+    bounds = bounds.tolist()
+
+    team_states = {}
+    p = 0
+    for team in arrays['teams'].tolist():
+        state = {}
+        for key in PARTITIONS:
+            lo, hi = bounds[p], bounds[p+1]
+            sums = (cum_for[lo+p:hi+p+1], cum_against[lo+p:hi+p+1],
+                    icum_for[lo+p:hi+p+1], icum_against[lo+p:hi+p+1])
+            state[key] = (partition_games[lo:hi], goals_for[lo:hi], goals_against[lo:hi], sums, ordinals[lo:hi])
+            p += 1
+        team_states[team] = state
+
+    season = Season(season_name)
+    season.set_state(games, team_states)
+
+    return season
+
+
+def loadSeasonCached(path, cache_dir=CACHE_DIR, use_mmap=False):
+    """
+    return: Season | the season in a .scores file, read from
+                     the cache when the file is unchanged
+    params:
+           path: string | path to .scores or .scores.gz file
+      cache_dir: string | cache directory
+       use_mmap: bool   | memory-map the .scores file on a cache miss
+    """
+    # e.g. 'scores/2005-2006.scores' ---> '2005_2006'
+    season_name = os.path.basename(path).split('.')[0].replace('-','_')
+
+    digest = fileHash(path)
+    cached = cachePath(season_name, digest, cache_dir)
+
+    season = None
+
+    # warm start: the built state is already on disk
+    if os.path.exists(cached):
+        try:
+            season = loadState(cached, season_name)
+        except LOAD_ERRORS:
+            season = None
+
+    # cold start: parse and build, then replace any stale entries
+    if season is None:
+        season = buildSeason(iterRecords(path, use_mmap=use_mmap), season_name)
+
+        makeDirs(cache_dir)
+
+        for stale in glob.glob(cachePath(season_name, '*', cache_dir)):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+        saveState(season, cached)
+
+    season.checksum = digest
+
+    return season
+
+
+def benchmark(directory='scores', repeat=3):
+    """
+    Time loading every season in directory without the cache,
+    through an empty cache (cold: parse, build and save) and
+    through the filled cache (warm, best of repeat runs)
+
+    return: dict[string:float] | seconds taken by each
+    params:
+        directory: string | directory holding .scores files
+           repeat: int    | warm runs
+    """
+    cache_dir = tempfile.mkdtemp()
+    paths = getSeasonFiles(directory)
+    timings = {}
+
+    try:
+        t0 = time.time()
+        for path in paths:
+            loadSeason(path)
+        timings['uncached'] = time.time() - t0
+
+        t0 = time.time()
+        for path in paths:
+            loadSeasonCached(path, cache_dir=cache_dir)
+        timings['cold'] = time.time() - t0
+
+        runs = []
+        for i in range(repeat):
+            t0 = time.time()
+            for path in paths:
+                loadSeasonCached(path, cache_dir=cache_dir)
+            runs.append(time.time() - t0)
+        timings['warm'] = min(runs)
+
+    finally:
+        shutil.rmtree(cache_dir)
+
+    for name in ['uncached', 'cold', 'warm']:
+        print name+': %.3f s (%d seasons, %.1f ms/season)' % (timings[name], len(paths), 1000.0*timings[name]/max(len(paths), 1))
+    print 'warm speedup: %.1fx' % (timings['uncached'] / max(timings['warm'], 1e-9))
+
+    return timings
+
+
+class FeatureCache(object):
+    """
+    Disk-backed cache of computed feature columns, one .npz
+    file per (season, checksum, parameters) key, aligned with
+    the season's canonical game store (see Season.get_projections
+    and Season.get_streaks, cache=...)
+
+    The least recently used files (by modification time, touched
+    on every hit) are evicted once the cache exceeds max_bytes
+
+    Several processes (e.g. main's worker pool) may share the
+    directory: files are renamed into place once fully written,
+    and files that vanish or cannot be read are misses
+    fields:
+        cache_dir: string
+        max_bytes: int
+             hits: int
+           misses: int
+    methods:
+        path(season_name, checksum, params)
+        load(season_name, checksum, params)
+        save(season_name, checksum, params, columns)
+        evict()
+        invalidate(season_name, checksum)
+    """
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR, 'features'), max_bytes=2**28):
+        """
+        params:
+          cache_dir: string | directory for the feature files
+          max_bytes: int    | size bound of the directory (default=256MB)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+
+
+    def path(self, season_name, checksum, params):
+        """
+        return: string | file for a season's features computed with params
+        params:
+          season_name: string | season (e.g. '2005_2006')
+             checksum: string | hash of the season's source data
+               params: tuple  | e.g. ('projections', 10, 'all', 'all', 'constant', ...)
+        """
+        key = hashlib.sha1(repr(tuple(params))).hexdigest()[:16]
+
+        return os.path.join(self.cache_dir, season_name+'.'+checksum+'.'+key+'.npz')
+
+
+    def load(self, season_name, checksum, params):
+        """
+        return: dict[string:list] | feature name ---> values per game
+                                    (None where a game lacks the
+                                    feature), None on a miss
+        params:
+            (see path)
+        """
+        path = self.path(season_name, checksum, params)
+
+        # another process may evict (or be writing) the file at any
+        # time, so a file that cannot be read is a miss
+        try:
+            data = np.load(path)
+            try:
+                columns = {}
+                for name in data.files:
+                    if name.startswith('present.'):
+                        continue
+                    present = data['present.'+name].tolist()
+                    values  = data[name].tolist()
+                    columns[name] = [v if p else None for v, p in zip(values, present)]
+            finally:
+                data.close()
+
+            # most recently used
+            os.utime(path, None)
+
+        except LOAD_ERRORS:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return columns
+
+
+    def save(self, season_name, checksum, params, columns):
+        """
+        Store feature columns (written to a temporary file and
+        renamed into place, see saveArrays), then evict down to
+        max_bytes
+
+        params:
+            (see path)
+            columns: dict[string:list] | feature name ---> values per
+                                         game (None where missing)
+        """
+        makeDirs(self.cache_dir)
+
+        arrays = {}
+        for name, values in columns.items():
+            present = [v is not None for v in values]
+            arrays[name] = np.array([v if p else 0 for v, p in zip(values, present)])
+            arrays['present.'+name] = np.array(present, dtype=bool)
+
+        saveArrays(self.path(season_name, checksum, params), arrays)
+
+        self.evict()
+
+
+    def evict(self):
+        """
+        return: int | number of least recently used files removed
+                      to bring the cache under max_bytes (files
+                      removed meanwhile by another process are skipped)
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for mtime, size, path in entries)
+
+        removed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+
+        return removed
+
+
+    def invalidate(self, season_name='*', checksum='*'):
+        """
+        return: int | number of cached files removed
+        params:
+          season_name: string | season to drop (default='*', every season)
+             checksum: string | only this version of the season's data
+                                (default='*', every version)
+        """
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, season_name+'.'+checksum+'.*.npz')):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+        return removed
+
+
+if __name__ == '__main__':
+    benchmark(*sys.argv[1:2])
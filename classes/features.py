@@ -8,14 +8,77 @@ and analysis package
 """
 import numpy as np
 import pandas as pd
-from random import shuffle
+from scaler import Scaler
+
+class _ColumnBuffer(object):
+    """
+    Rows appended to a Features object, held as growable
+    NumPy columns (capacity doubles when full, so appending
+    is amortized O(1)) until the DataFrame is next read
+    """
+    def __init__(self, capacity=1024):
+        self.columns  = []
+        self.data     = {}
+        self.size     = 0
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.size
+
+    def _add_column(self, name):
+        # rows before the column appeared are NaN
+        self.columns.append(name)
+        self.data[name] = np.empty(self.capacity, dtype=np.float64)
+        self.data[name][:self.size] = np.nan
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, column in self.data.items():
+            grown = np.empty(self.capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.data[name] = grown
+
+    def append(self, row):
+        """
+        params:
+            row: dict[string:dtype] | column names and data
+        """
+        if self.size == self.capacity:
+            self._grow()
+
+        for name, value in row.items():
+            if name not in self.data:
+                self._add_column(name)
+            try:
+                self.data[name][self.size] = value
+            except (TypeError, ValueError):
+                # non-numeric data: keep the column as objects
+                self.data[name] = self.data[name].astype(object)
+                self.data[name][self.size] = value
+
+        # absent names are NaN
+        if len(row) < len(self.columns):
+            for name in self.columns:
+                if name not in row:
+                    self.data[name][self.size] = np.nan
+
+        self.size += 1
+
+    def frame(self):
+        """
+        return: pd.DataFrame | buffered rows (copied out of the buffer)
+        """
+        return pd.DataFrame(dict((name, self.data[name][:self.size].copy()) for name in self.columns),
+                            columns=self.columns)
+
 
 class Features(object):
     """
     Features object
 
     fields:
-        _df:             pd.DataFrame
+        _df:             pd.DataFrame (property: appended rows are
+                                       buffered and joined on read)
         _feature_names:  list[string]
         _class_names:    list[string]
 
@@ -63,12 +126,17 @@ class Features(object):
         rename_feature(current_name, new_name)          | N/A
         rename_class(current_name, new_name)            | N/A
         --
-        scale_feature(feature_name)                     | N/A
-        scale_features(feature_names)                   | N/A
+        scale_feature(feature_name, scaler)             | Scaler
+        scale_features(feature_names, scaler)           | Scaler
         --
         append(row)                                     | N/A
+        get_rows(idx, as_values)                        | pd.DataFrame or np.array[dtype]
+        get_slice(begin, end, stride, as_values)        | pd.DataFrame or np.array[dtype]
         split_data(train_perc, cv_perc, test_perc,      |
                                as_values, randomize)    | pd.DataFrame*3 or np.array[dtype]*3
+        split_indices(frac, randomize, seed)            | np.array[int]*2
+        kfold_indices(k, randomize, seed)               | iterator[(np.array[int], np.array[int])]
+        walk_forward_splits(dates, test_dates)          | iterator[(slice, slice)]
     """
     def __init__(self, feature_names=[], class_names=[], *args, **kwargs):
         """
@@ -84,8 +152,41 @@ class Features(object):
         #### NEED CHECK FOR feature_names + class_names and columns consistency ####
         self._feature_names = feature_names
         self._class_names   = class_names
+        self._buffer = _ColumnBuffer()
         self._df = pd.DataFrame(*args, **kwargs)
 
+    def _get_df(self):
+        """
+        return: pd.DataFrame | all data, including buffered rows
+        """
+        if len(self._buffer):
+            self._flush()
+        return self._frame
+
+    def _set_df(self, df):
+        """
+        Replace all data (dropping any buffered rows)
+        """
+        self._buffer = _ColumnBuffer()
+        self._frame = df
+
+    _df = property(_get_df, _set_df)
+
+    def _flush(self):
+        """
+        Join the buffered rows onto the DataFrame
+        """
+        rows = self._buffer.frame()
+        self._buffer = _ColumnBuffer()
+
+        columns = list(self._frame.columns) + [c for c in rows.columns if c not in self._frame.columns]
+
+        if len(self._frame):
+            self._frame = pd.concat([self._frame.reindex(columns=columns),
+                                     rows.reindex(columns=columns)], ignore_index=True)
+        else:
+            self._frame = rows.reindex(columns=columns)
+
     def __repr__(self):
         """
         Use the pd.DataFrame.__repr__()
@@ -144,7 +245,7 @@ class Features(object):
         """
         return: int | number of examples
         """
-        return len(self._df)
+        return len(self._frame) + len(self._buffer)
 
     def _insert_column(self, column_array, column_name):
         """
@@ -223,7 +324,7 @@ class Features(object):
             feature_name: string | feature to delete
         """
         self._delete_column(feature_name)
-        self._feature_names.pop(feature_name)
+        self._feature_names.remove(feature_name)
 
     def delete_features(self, feature_names):
         """
@@ -243,7 +344,7 @@ class Features(object):
             class_name: string | class to delete
         """
         self._delete_column(class_name)
-        self._class_names.pop(class_name)
+        self._class_names.remove(class_name)
 
     def delete_classes(self, class_names):
         """
@@ -432,32 +533,34 @@ class Features(object):
         self._class_names.remove(current_name)
         self._class_names.append(new_name)
 
-    def scale_feature(self, feature_name):
+    def scale_feature(self, feature_name, scaler=None):
         """
         Scale the feature given by feature_name
         Note: this changes the feature in self explicitly
 
+        return: Scaler | statistics used, to scale new data alike
         params:
             feature_name: string | name of feature to be scaled
+                  scaler: Scaler | see scale_features()
         """
         assert_msg = feature_name+' not in self.feature_names() - cannot scale'
         assert self.has_feature(feature_name), assert_msg
 
-        feature = self.get_feature(feature_name)
+        return self.scale_features([feature_name], scaler=scaler)
 
-        mean = feature.mean()
-        span = (feature.max() - feature.min())/2.0
-
-        self._df[feature_name] = (feature - mean) / span
-
-    def scale_features(self, feature_names=['all']):
+    def scale_features(self, feature_names=['all'], scaler=None):
         """
-        Scale given list of features
+        Scale given list of features: (x-mean)/((max-min)/2)
+        Note: this changes the features in self explicitly
 
+        return: Scaler | statistics used, to scale new data alike
         params:
             feature_names: list[string] | list of feature names
                                         | default=['all'] (i.e.
                                         | scale all features)
+                   scaler: Scaler       | fitted Scaler to reuse; an
+                                        | unfitted one is fitted here
+                                        | (default=None, a new one)
         """
         if feature_names == ['all'] and 'all' not in self.feature_names():
             feature_names = self.feature_names()
@@ -465,18 +568,39 @@ class Features(object):
         assert_msg = 'one or more features not in self.feature_names() - cannot scale'
         assert self.has_features(feature_names), assert_msg
 
-        for feature_name in feature_names:
-            self.scale_feature(feature_name)
+        values = self.get_features(feature_names, as_values=True)
+
+        if scaler is None:
+            scaler = Scaler(span='half')
+        if not scaler.fitted():
+            scaler.fit(values, feature_names)
+
+        self._set_columns(feature_names, scaler.transform(values, feature_names))
+
+        return scaler
+
+    def _set_columns(self, column_names, values):
+        """
+        Overwrite existing columns
+
+        params:
+            column_names: list[string]        | columns to overwrite
+                  values: np.array[float64]   | 2D (rows x columns) data
+        """
+        for j, column_name in enumerate(column_names):
+            self._df[column_name] = values[:, j]
 
     def append(self, row):
         """
         Append a new row to the self._df DataFrame
           ---> NaN's inserted for absent feature/class names
+          ---> rows are buffered in NumPy columns (amortized O(1))
+               and joined onto the DataFrame when it is next read
 
         params:
             row: dict[string:dtype] | dictionary of feature/class names and data
         """
-        self._df = self._df.append(row, ignore_index=True)
+        self._buffer.append(row)
 
     def get_rows(self, idx, as_values=False):
         """
@@ -487,6 +611,8 @@ class Features(object):
                 idx: int       | row index
                      -- OR --
                      list[int] | list of row indices
+                     -- OR --
+                     slice     | range of rows (a view, not a copy)
           as_values: bool | return as np.array or not
         """
         if as_values:
@@ -498,7 +624,7 @@ class Features(object):
         """
         Calls get_rows()
         """
-        return get_rows(idx=idx, as_values=as_values)
+        return self.get_rows(idx=idx, as_values=as_values)
 
     def get_slice(self, begin=None, end=None, stride=None, as_values=False):
         """
@@ -510,52 +636,14 @@ class Features(object):
              stride: int  | stride for slice
           as_values: bool | return as np.array or not
         """
-        if begin:
-            if end:
-                if stride:
-                    result = self._df.iloc[begin:end:stride]
-                else:
-                    result = self._df.iloc[begin:end]
-            else:
-                if stride:
-                    result = self._df.iloc[begin::stride]
-                else:
-                    result = self._df.iloc[begin:]
-
-        elif end:
-            if stride:
-                result = self._df.iloc[:end:stride]
-            else:
-                result = self._df.iloc[:end]
+        result = self._df.iloc[begin:end:stride]
 
         if as_values:
             return result.values
         else:
             return result
 
-
-
-
-
-        if begin and end and stride:
-            result = self._df.iloc[begin:end:stride]
-        elif begin and end and not stride:
-            result = self._df.iloc[begin:end]
-        elif begin and not end and stride:
-
-
-        else:
-            if end:
-                result = self._df.iloc[:end:stride]
-            else:
-                result = self._df.iloc[::stride]
-
-        if as_values:
-            return self._df.iloc[begin:end:stride].values
-        else:
-            return self._df.iloc[begin:end:stride]
-
-    def split_data(self, frac=0.70, as_values=False, randomize=True):
+    def split_data(self, frac=0.70, as_values=False, randomize=True, seed=None):
         """
         return: pd.DataFrame, pd.DataFrame
                 -- OR (depending on the as_values flag) --
@@ -565,61 +653,430 @@ class Features(object):
                        | second segment will thus be (1-frac)
             as_values: bool  | return as np.array or not
             randomize: bool  | random shuffling for train/test/cv data or not
+                 seed: int   | seed for a reproducible shuffle (default=None)
+        """
+        first, second = self.split_indices(frac=frac, randomize=randomize, seed=seed)
+
+        first_data  = self.get_rows(first)
+        second_data = self.get_rows(second)
+
+        if as_values:
+            return first_data.values, second_data.values
+
+        return first_data, second_data
+
+    def _permutation(self, randomize=True, seed=None):
+        """
+        return: np.array[int] | row indices, shuffled if randomize
         """
         N = self.num_examples()
 
-        indices = range(N)
         if randomize:
-            shuffle(indices)
+            return np.random.RandomState(seed).permutation(N)
+
+        return np.arange(N)
+
+    def split_indices(self, frac=0.70, randomize=True, seed=None):
+        """
+        Split rows without copying data (pass the indices
+        to get_rows() when the data itself is needed)
+
+        return: np.array[int], np.array[int] | row indices of the first
+                                               and second segments
+        params:
+                 frac: float | fraction of rows for first segment (between 0-1)
+            randomize: bool  | random shuffling or not
+                 seed: int   | seed for a reproducible shuffle (default=None)
+        """
+        indices = self._permutation(randomize=randomize, seed=seed)
+
+        split = int(len(indices)*frac)
+
+        return indices[:split], indices[split:]
+
+    def kfold_indices(self, k=5, randomize=True, seed=None):
+        """
+        k-fold cross-validation over row indices: every row is in
+        exactly one test fold and only index arrays are built
+
+        yield: np.array[int], np.array[int] | train and test row indices
+        params:
+                    k: int  | number of folds
+            randomize: bool | random shuffling or not
+                 seed: int  | seed for a reproducible shuffle (default=None)
+        """
+        assert_msg = 'k='+str(k)+' must be between 2 and num_examples()'
+        assert 2 <= k <= self.num_examples(), assert_msg
+
+        indices = self._permutation(randomize=randomize, seed=seed)
+
+        # fold boundaries (sizes differ by at most one)
+        bounds = [len(indices)*i // k for i in range(k+1)]
+
+        for i in range(k):
+            test  = indices[bounds[i]:bounds[i+1]]
+            train = np.concatenate([indices[:bounds[i]], indices[bounds[i+1]:]])
+            yield train, test
+
+    def walk_forward_splits(self, dates, test_dates):
+        """
+        Chronological splits: for each date D in test_dates, train on
+        the rows before D and test on the rows from D up to the next
+        test date (or the end); get_rows() on the slices gives views
+
+        yield: slice, slice | train rows, test rows
+        params:
+                 dates: list[string] | date of each row, in date order
+                                       (e.g. [g.date for g in games])
+            test_dates: list[string] | start dates of the test periods
+        """
+        dates = np.asarray(dates)
+
+        assert_msg = 'dates has '+str(len(dates))+' rows, expected '+str(self.num_examples())
+        assert len(dates) == self.num_examples(), assert_msg
+
+        assert_msg = 'dates must be in chronological order'
+        assert len(dates) < 2 or (dates[1:] >= dates[:-1]).all(), assert_msg
+
+        # first row on or after each test date
+        starts = list(np.searchsorted(dates, sorted(test_dates), side='left')) + [len(dates)]
+
+        for i in range(len(starts)-1):
+            yield slice(0, starts[i]), slice(starts[i], starts[i+1])
+
+
+class BlockFeatures(Features):
+    """
+    Features object stored in one preallocated float64 NumPy
+    block (rows x columns) with a name ---> column index:
+    features fill the first columns, classes the ones after
+    them, and rows and columns both grow by doubling capacity
+
+    Inserting, deleting and renaming columns never reallocate
+    the block (renaming only updates the index), appends are
+    amortized O(1), and as_values getters return views of the
+    block when the columns are contiguous (e.g. all features,
+    all classes or a single column) instead of copies
+
+    fields:
+        _block:  np.array[float64] (capacity rows x capacity columns)
+        _index:  dict[string:int]
+        _size:   int (number of examples in use)
+
+    Note: data must be numeric; _df is a DataFrame built
+          over a view of the block (modify through methods)
+    """
+    def __init__(self, feature_names=[], class_names=[], *args, **kwargs):
+        """
+        Initialize BlockFeatures object
+
+        params:
+            capacity: int  | initial number of rows (keyword only,
+                             default=1024)
+            *args, **kwargs: arguments for pd.DataFrame.__init__()
+        """
+        self._feature_names = list(feature_names)
+        self._class_names   = list(class_names)
+        self._capacity = kwargs.pop('capacity', 1024)
+        self._df = pd.DataFrame(*args, **kwargs)
+
+    def _get_df(self):
+        """
+        return: pd.DataFrame | all data (a view of the block)
+        """
+        return pd.DataFrame(self._block[:self._size, :self.num_columns()],
+                            columns=self.column_names(), copy=False)
+
+    def _set_df(self, df):
+        """
+        Replace all data with the columns of df
+
+        params:
+            df: pd.DataFrame | data (all columns are features if
+                               no feature/class names are given)
+        """
+        if not self._feature_names and not self._class_names:
+            self._feature_names = list(df.columns)
+
+        column_names = self.column_names()
+
+        assert_msg = 'columns '+str(list(df.columns))+' do not match '+str(column_names)
+        assert len(df.columns) == 0 or sorted(df.columns) == sorted(column_names), assert_msg
+
+        self._size  = len(df)
+        self._block = np.empty((max(self._size, self._capacity), max(len(column_names), 8)))
+        self._index = dict((name, j) for j, name in enumerate(column_names))
+
+        for j, name in enumerate(column_names):
+            if name in df:
+                self._block[:self._size, j] = df[name].values
+            else:
+                self._block[:self._size, j] = np.nan
+
+    _df = property(_get_df, _set_df)
+
+    def num_examples(self):
+        """
+        return: int | number of examples
+        """
+        return self._size
+
+    def _reserve(self, rows, columns):
+        """
+        Grow the block (doubling) to hold at least rows x columns
+        """
+        capacity_rows, capacity_columns = self._block.shape
 
-        first_data  = self.get_rows(indices[:int(N*frac)])
-        second_data = self.get_rows(indices[int(N*frac):])
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
 
+        while capacity_rows < rows: capacity_rows *= 2
+        while capacity_columns < columns: capacity_columns *= 2
+
+        block = np.empty((capacity_rows, capacity_columns))
+        block[:self._size, :self.num_columns()] = self._block[:self._size, :self.num_columns()]
+        self._block = block
+
+    def _insert_column(self, column_array, column_name, position=None):
+        """
+        Insert a column (later columns move one to the right)
+
+        params:
+            column_array: list[float] | data to insert
+             column_name: string      | name of column to insert
+                position: int         | column position (default=last)
+        """
+        assert_msg = column_name+' already exists - cannot insert'
+        assert column_name not in self.column_names(), assert_msg
+
+        n, k = self._size, self.num_columns()
+        if position is None:
+            position = k
+
+        column_array = np.asarray(column_array, dtype=np.float64)
+
+        # first column of an empty object sets the number of examples
+        if k == 0 and n == 0:
+            n = self._size = len(column_array)
+
+        assert_msg = column_name+' has '+str(len(column_array))+' rows, expected '+str(n)
+        assert len(column_array) == n, assert_msg
+
+        self._reserve(n, k+1)
+
+        self._block[:n, position+1:k+1] = self._block[:n, position:k]
+        self._block[:n, position] = column_array
+
+        for name, j in self._index.items():
+            if j >= position:
+                self._index[name] = j + 1
+        self._index[column_name] = position
+
+    def insert_feature(self, feature_array, feature_name):
+        """
+        Insert a feature (after the other features)
+
+        params:
+            feature_array: list[float] | feature data
+             feature_name: string      | feature name
+        """
+        self._insert_column(feature_array, feature_name, position=self.num_features())
+        self._feature_names.append(feature_name)
+
+    def insert_class(self, class_array, class_name):
+        """
+        Insert a class (after the other classes)
+
+        params:
+            class_array: list[float] | class data
+             class_name: string      | class name
+        """
+        self._insert_column(class_array, class_name, position=self.num_columns())
+        self._class_names.append(class_name)
+
+    def _delete_column(self, column_name):
+        """
+        Remove column (later columns move one to the left)
+
+        params:
+            column_name: string | name of column to delete
+        """
+        assert_msg = column_name+' not present - cannot delete'
+        assert column_name in self.column_names(), assert_msg
+
+        n, k = self._size, self.num_columns()
+        position = self._index.pop(column_name)
+
+        self._block[:n, position:k-1] = self._block[:n, position+1:k]
+
+        for name, j in self._index.items():
+            if j > position:
+                self._index[name] = j - 1
+
+    def _columns(self, column_names):
+        """
+        return: slice or list[int] | block columns for column_names
+                                     (a slice when contiguous)
+        """
+        columns = [self._index[name] for name in column_names]
+
+        if columns and columns == range(columns[0], columns[0]+len(columns)):
+            return slice(columns[0], columns[0]+len(columns))
+
+        return columns
+
+    def _get(self, column_names, as_values=False):
+        """
+        return: pandas Series | column data with name
+                -- OR (depending on as_values flag) --
+                np.array      | 1D array of column data
+                                (views of the block when the
+                                columns are contiguous)
+
+        params:
+           column_names: string       | column to get
+                         -- OR --
+                         list[string] | columns to get
+              as_values: bool         | return as np.array or not
+        """
+        n = self._size
+
+        if isinstance(column_names, basestring):
+            values = self._block[:n, self._index[column_names]]
+            if as_values:
+                return values
+            return pd.Series(values, name=column_names, copy=False)
+
+        values = self._block[:n, self._columns(column_names)]
         if as_values:
-            return first_data.values, second_data.values
+            return values
+        return pd.DataFrame(values, columns=column_names, copy=False)
 
-        return first_data, second_data
+    def _rename_column(self, current_name, new_name):
+        """
+        Rename column; current name ---> new_name (index only)
+        """
+        self._index[new_name] = self._index.pop(current_name)
+
+    def rename_feature(self, current_name, new_name):
+        """
+        Rename feature in place; current_name ---> new_name
+
+        params:
+           current_name: string | name of feature to be renamed
+               new_name: string | name to be given to feature
+        """
+        assert_msg = current_name+' not in self.feature_names() - cannot rename'
+        assert self.has_feature(current_name), assert_msg
+
+        self._rename_column(current_name, new_name)
+
+        # keep the name order matching the block columns
+        self._feature_names[self._feature_names.index(current_name)] = new_name
+
+    def rename_class(self, current_name, new_name):
+        """
+        Rename class in place; current_name ---> new_name
+
+        params:
+           current_name: string | name of class to be renamed
+               new_name: string | name to be given to class
+        """
+        assert_msg = current_name+' not in self.class_names() - cannot rename'
+        assert self.has_class(current_name), assert_msg
+
+        self._rename_column(current_name, new_name)
+
+        self._class_names[self._class_names.index(current_name)] = new_name
+
+    def _set_columns(self, column_names, values):
+        """
+        Overwrite existing columns in place
+
+        params:
+            column_names: list[string]        | columns to overwrite
+                  values: np.array[float64]   | 2D (rows x columns) data
+        """
+        self._block[:self._size, self._columns(column_names)] = values
+
+    def append(self, row):
+        """
+        Append a new row (amortized O(1))
+          ---> NaN's inserted for absent feature/class names
+
+        params:
+            row: dict[string:float] | dictionary of feature/class names and data
+        """
+        assert_msg = 'unknown names in row: '+str([name for name in row if name not in self._index])
+        assert all(name in self._index for name in row), assert_msg
 
+        self._reserve(self._size+1, self.num_columns())
 
+        values = self._block[self._size]
+        values[:self.num_columns()] = np.nan
+        for name, value in row.items():
+            values[self._index[name]] = value
 
-def main():
+        self._size += 1
 
+
+def main(N=int(1e4), path=None):
+    """
+    Benchmark N row appends: Features.append and
+    BlockFeatures.append against pd.DataFrame.append
+    (one full copy per row)
+
+    return: dict[string:float] | seconds taken by each
+    params:
+           N: int    | rows appended
+        path: string | file to append the timings to as one JSON
+                       line (with N and the time of the run), to
+                       compare runs
+    """
     import time
-    t0 = time.time()
-    N = int( 1e4 )
-#    f = Features(index=range(N))
-#    print "init:", time.time() - t0
-#    f.insert_feature(range(N), 'a')
-#    print "insert 1 feature:", time.time() - t0
-#    f.insert_feature(range(N), 'b')
-#    f.insert_feature(range(N), 'c')
-#    f.insert_feature(range(N), 'd')
-#    f.insert_feature(range(N), 'e')
-#    f.insert_feature(range(N), 'f')
-#    print "insert 5 more features:", time.time() - t0
+    import json
+    headers = ['a','b','c','d','e','f']
+    row = dict((h, 1) for h in headers)
+    timings = {}
 
+    t0 = time.time()
     f = Features()
-    headers = ['a','b','c','d','e','f']
-    f.insert_features([[]]*len(headers), headers)
     for i in xrange(N):
-        f = f.append_row({'a':1,'b':1,'c':1,'d':1,'e':1,'f':1})
-    print "append row:", time.time() - t0
+        f.append(row)
+    assert f.num_examples() == N, 'num_examples='+str(f.num_examples())
+    timings['Features.append'] = time.time() - t0
 
-    print '========================================='
+    t0 = time.time()
+    f = BlockFeatures(feature_names=headers)
+    for i in xrange(N):
+        f.append(row)
+    assert f.num_examples() == N, 'num_examples='+str(f.num_examples())
+    timings['BlockFeatures.append'] = time.time() - t0
 
     t0 = time.time()
     df = pd.DataFrame(columns=headers)
     for i in xrange(N):
-        df = df.append({'a':1,'b':1,'c':1,'d':1,'e':1,'f':1}, ignore_index=True)
-    print "append:", time.time() - t0
-
+        df = df.append(row, ignore_index=True)
+    timings['DataFrame.append'] = time.time() - t0
 
+    for name in sorted(timings):
+        print name+': %.3f s (%d rows/s)' % (timings[name], N/timings[name])
 
+    if path:
+        out = open(path, 'a')
+        out.write(json.dumps({'N': N, 'time': time.time(), 'timings': timings})+'\n')
+        out.close()
 
+    return timings
 
 
 if __name__ == '__main__':
-    main()
+    import sys
+    # e.g. python features.py 2000 append_timings.jsonl
+    args = sys.argv[1:3]
+    if args:
+        args[0] = int(args[0])
+    main(*args)
 
 
 
@@ -628,8 +1085,3 @@ if __name__ == '__main__':
     #.truncate() for date range selection
 
     # from_records() for MySQL read-in ---> pd.io.sql
-
-
-
-
-
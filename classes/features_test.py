@@ -3,8 +3,17 @@
 features_test.py
 Author: Brian Boates
 """
+import os
+import sys
 import numpy as np
-from features import Features
+import pandas as pd
+
+# import through the package (as main and utils do), so there is
+# one Scaler class even when run from classes/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from classes import features
+from classes.features import Features, BlockFeatures
+from classes.scaler import Scaler
 
 def test_column_names(f, column_names):
     passed = 'passed: Features.column_names()'
@@ -79,6 +88,106 @@ def test_num_examples(f, num_examples):
         print failed
 
 
+def test_append():
+    passed = 'passed: Features.append()'
+    failed = 'failed: Features.append()'
+    try:
+        f = Features(columns=['a','b'])
+        rows = [{'a':i, 'b':2*i} for i in xrange(2500)] + [{'a':-1, 'c':'x'}]
+        for row in rows:
+            f.append(row)
+        expected = pd.DataFrame(columns=['a','b'])
+        for row in rows:
+            expected = expected.append(row, ignore_index=True)
+        df = f._df
+        if (f.num_examples() == len(rows) and list(df.columns) == ['a','b','c'] and
+            np.allclose(df['a'].values.astype(float), expected['a'].values.astype(float)) and
+            np.isnan(df['b'].values[-1]) and df['c'].values[-1] == 'x' and
+            df['c'].isnull().sum() == len(rows)-1):
+            print passed
+        else: print failed
+    except:
+        print failed
+
+
+def test_append_benchmark(N=2000, ratio=20.0):
+    passed = 'passed: Features.append() benchmark'
+    failed = 'failed: Features.append() benchmark'
+    try:
+        # appends must stay far cheaper than one DataFrame copy per row
+        timings = features.main(N)
+        slowest = max(timings['Features.append'], timings['BlockFeatures.append'])
+        if slowest * ratio < timings['DataFrame.append']:
+            print passed
+        else: print failed
+    except:
+        print failed
+
+
+def test_block_features(data, feature_names, class_names):
+    passed = 'passed: BlockFeatures'
+    failed = 'failed: BlockFeatures'
+    try:
+        f = BlockFeatures(feature_names=feature_names, class_names=class_names,
+                          data=data, columns=feature_names+class_names, capacity=4)
+        features, classes = f.get_features(as_values=True), f.get_classes(as_values=True)
+        views = features.base is f._block and classes.base is f._block
+        same = np.array_equal(f.get_all(as_values=True), data)
+        f.insert_feature(np.zeros(len(data)), 'g')
+        f.rename_feature('a', 'A')
+        f.delete_class('y')
+        for i in xrange(20):
+            f.append({'A':1.0, 'g':2.0})
+        grown = (f.num_examples() == len(data)+20 and f.column_names()[-3:] == ['g','x','z'] and
+                 np.array_equal(f.get_feature('A', as_values=True)[:len(data)], data[:,0]) and
+                 np.isnan(f.get_class('z', as_values=True)[-1]) and
+                 np.array_equal(f.get_class('z', as_values=True)[:len(data)], data[:,-1]))
+        if views and same and grown: print passed
+        else: print failed
+    except:
+        print failed
+
+
+def test_splits(f):
+    passed = 'passed: Features split APIs'
+    failed = 'failed: Features split APIs'
+    try:
+        N = f.num_examples()
+        first, second = f.split_indices(frac=0.7, seed=1)
+        again, _ = f.split_indices(frac=0.7, seed=1)
+        split = (len(first) == int(N*0.7) and np.array_equal(first, again) and
+                 sorted(np.concatenate([first, second])) == range(N))
+        folds = list(f.kfold_indices(k=3, seed=1))
+        tests = np.concatenate([test for train, test in folds])
+        kfold = (len(folds) == 3 and sorted(tests) == range(N) and
+                 all(len(train)+len(test) == N for train, test in folds))
+        dates = ['2011-10-%02d' % (i+1) for i in xrange(N)]
+        walks = list(f.walk_forward_splits(dates, ['2011-10-05', '2011-10-08']))
+        walk = walks == [(slice(0, 4), slice(4, 7)), (slice(0, 7), slice(7, N))]
+        if split and kfold and walk: print passed
+        else: print failed
+    except:
+        print failed
+
+
+def test_scale_features(data, feature_names, class_names):
+    passed = 'passed: Features.scale_features()'
+    failed = 'failed: Features.scale_features()'
+    try:
+        f = Features(feature_names=feature_names, class_names=class_names,
+                     data=data.copy(), columns=feature_names+class_names)
+        scaler = f.scale_features()
+        a = data[:, 0]
+        expected = (a - a.mean()) / ((a.max() - a.min())/2.0)
+        restored = Scaler.from_dict(scaler.to_dict())
+        if (np.allclose(f.get_feature('a', as_values=True), expected) and
+            np.allclose(restored.transform(data[:, :len(feature_names)]), f.get_features(as_values=True))):
+            print passed
+        else: print failed
+    except:
+        print failed
+
+
 def test_insert_column(f):
     pass
 
@@ -108,6 +217,11 @@ def main():
     test_num_features(f, num_features)
     test_num_classes(f, num_classes)
     test_num_examples(f, num_examples)
+    test_append()
+    test_append_benchmark()
+    test_splits(f)
+    test_scale_features(data, list(feature_names), list(class_names))
+    test_block_features(data, list(feature_names), list(class_names))
     
 
     
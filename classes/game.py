@@ -6,20 +6,43 @@ Author: Brian Boates
 Game object for hockey analysis and 
 prediction package
 """
+import datetime
 
-class Game():
+# small-int codes for game results
+RESULTS      = ['R', 'OT', 'SO']
+RESULT_CODES = dict((r, i) for i, r in enumerate(RESULTS))
+R, OT, SO    = range(len(RESULTS))
+
+def date_ordinal(date):
+    """
+    return: int | proleptic Gregorian ordinal of date
+    params:
+        date: string        | date string e.g. '2010-10-31'
+              -- OR --
+              datetime.date | date object
+    """
+    if isinstance(date, datetime.date):
+        return date.toordinal()
+    
+    return datetime.date(int(date[:4]), int(date[5:7]), int(date[8:10])).toordinal()
+
+
+class Game(object):
     """
-    Game object
+    Game object (compact: fixed __slots__, result stored as
+    a small-int code, features dict created on first use)
     fields:
             date: string
-            year: int
-           month: int
-             day: int
+         ordinal: int (date ordinal)
+            year: int (derived from date)
+           month: int (derived from date)
+             day: int (derived from date)
             away: string
             home: string
       away_goals: int
       home_goals: int
-          result: string
+          result: string (stored as code, see RESULTS)
+        features: dict[string:float]
     methods:
         get_date()
         winner()
@@ -32,28 +55,97 @@ class Game():
         goals_against(team)
         diff_score()
         numerical_result()
-        insert_projections(proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA, proj_diff_score)
-        insert_streak(streak, location)
+        insert_projections(proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA, proj_diff_score, suffix)
+        insert_streak(streak, location, kind)
     """
+    __slots__ = ['date', 'ordinal', 'away', 'home', 'away_goals',
+                 'home_goals', '_result', '_features']
+    
     def __init__(self, record=None):
         """
         Initialize Game object, record mandatory
         """
         if record:
             self.date       = str(record[0])
-            self.year       = int(self.date.split('-')[0])
-            self.month      = int(self.date.split('-')[1])
-            self.day        = int(self.date.split('-')[2])
+            self.ordinal    = date_ordinal(record[0])
             self.away       = str(record[1])
             self.home       = str(record[2])
             self.away_goals = int(record[3])
             self.home_goals = int(record[4])
             self.result     = str(record[5])
-            self.features   = {}
+            self._features  = None
         else:
             s = 'Must provide record when initializting game object'
             raise AttributeError(s)
     
+    
+    def __getstate__(self):
+        """
+        Pickle support (no __dict__ with __slots__)
+        """
+        return (self.date, self.ordinal, self.away, self.home,
+                self.away_goals, self.home_goals, self._result, self._features)
+    
+    
+    def __setstate__(self, state):
+        """
+        Unpickle support
+        """
+        (self.date, self.ordinal, self.away, self.home,
+         self.away_goals, self.home_goals, self._result, self._features) = state
+    
+    
+    @property
+    def year(self):
+        """
+        return: int | year of the game
+        """
+        return int(self.date[:4])
+    
+    
+    @property
+    def month(self):
+        """
+        return: int | month of the game
+        """
+        return int(self.date[5:7])
+    
+    
+    @property
+    def day(self):
+        """
+        return: int | day of the game
+        """
+        return int(self.date[8:10])
+    
+    
+    @property
+    def result(self):
+        """
+        return: string | 'R', 'OT', or 'SO'
+        """
+        return RESULTS[self._result]
+    
+    
+    @result.setter
+    def result(self, result):
+        """
+        Store result string as its small-int code
+        """
+        assert result in RESULT_CODES, 'result='+str(result)
+        self._result = RESULT_CODES[result]
+    
+    
+    @property
+    def features(self):
+        """
+        return: dict[string:float] | features inserted into Game
+        """
+        # only games that get features pay for a dict
+        if self._features is None:
+            self._features = {}
+        return self._features
+    
         
     def __repr__(self):
         """
@@ -120,28 +212,28 @@ class Game():
         """
         return: bool | whether the game ended in regulation or not
         """
-        return self.result == 'R'
+        return self._result == R
     
     
     def ended_in_OT(self):
         """
         return: bool | whether the game ended in OT or not
         """
-        return self.result == 'OT'
+        return self._result == OT
     
     
     def ended_in_SO(self):
         """
         return: bool | whether the game ended in a SO or not
         """
-        return self.result == 'SO'
+        return self._result == SO
     
     
     def has_team(self, team):
         """
         return: bool | whether the team is home or away
         """
-        return team in [self.home, self.away]
+        return team == self.home or team == self.away
     
     
     def goals_for(self, team, include_SO=False):
@@ -221,7 +313,7 @@ class Game():
         elif self.away == self.winner(): return 0
     
     
-    def insert_projections(self, proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA, proj_diff_score):
+    def insert_projections(self, proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA, proj_diff_score, suffix=''):
         """
         Insert projected scores into Game
         
@@ -231,32 +323,35 @@ class Game():
              proj_away_GF: float | projected GF for away team
              proj_away_GA: float | projected GA for away team
           proj_diff_score: float | projected score differential
+                   suffix: string | appended to the feature names
+                                    (e.g. '_w10_all_all_constant')
         """
-        self.features['proj_home_GF']    = proj_home_GF
-        self.features['proj_home_GA']    = proj_home_GA
-        self.features['proj_away_GF']    = proj_away_GF
-        self.features['proj_away_GA']    = proj_away_GA
-        self.features['proj_diff_score'] = proj_diff_score
+        self.features['proj_home_GF'+suffix]    = proj_home_GF
+        self.features['proj_home_GA'+suffix]    = proj_home_GA
+        self.features['proj_away_GF'+suffix]    = proj_away_GF
+        self.features['proj_away_GA'+suffix]    = proj_away_GA
+        self.features['proj_diff_score'+suffix] = proj_diff_score
     
     
-    def insert_streak(self, streak, location):
+    def insert_streak(self, streak, location, kind=None):
         """
         Insert streaks for home or away team coming into Game
         
         params:
             streak: int    | streak (pos=winning, neg=losing)
           location: string | 'home' or 'away'
+              kind: string | streak variant, e.g. 'point' stores
+                             'home_point_streak' (default=None
+                             stores 'home_streak')
         """
         assert location in ['home', 'away'], 'location='+str(location)
         
-        if location == 'home':
-            self.features['home_streak'] = streak
-        elif location == 'away':
-            self.features['away_streak'] = streak
+        suffix = '_'+kind+'_streak' if kind else '_streak'
+        
+        self.features[location+suffix] = streak
         
         # if both home and away streaks are available, insert difference
         try:
-            self.features['diff_streak'] = self.features['home_streak'] - self.features['away_streak']
+            self.features['diff'+suffix] = self.features['home'+suffix] - self.features['away'+suffix]
         except KeyError:
             pass
-    
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""
+projections.py
+Author: Brian Boates
+
+Vectorized (NumPy) projection engine for
+the hockey analysis and prediction package
+
+Builds each team's goal arrays once, computes
+every window with one correlation per team and
+looks up each game's window by binary search
+over the team's date ordinals
+"""
+import numpy as np
+from utils import get_weights
+
+def team_series(team_season, location='all', result='all'):
+    """
+    return: ordinals, goals_for, goals_against | np.array*3
+            ---> team's partition for location and result
+    params:
+      team_season: TeamSeason | team to get goals for
+         location: string     | 'all', 'home', or 'away'
+           result: string     | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+    """
+    ordinals, goals_for, goals_against = team_season.get_goals_series(location=location, result=result)
+
+    return (np.array(ordinals,      dtype=np.int64),
+            np.array(goals_for,     dtype=np.float64),
+            np.array(goals_against, dtype=np.float64))
+
+
+def team_windows(series, weights):
+    """
+    return: ordinals, proj_GF, proj_GA | np.array*3
+            ---> proj_GF[j] is the weighted goals for over
+                 partition games j, ..., j+N-1
+    params:
+       series: tuple       | output of team_series()
+      weights: list[float] | window weights, oldest game first
+    """
+    ordinals, goals_for, goals_against = series
+
+    weights = np.asarray(weights, dtype=np.float64)
+
+    # not enough games for a single window
+    if len(ordinals) < len(weights):
+        empty = np.empty(0, dtype=np.float64)
+        return ordinals, empty, empty
+
+    proj_GF = np.correlate(goals_for,     weights, 'valid')
+    proj_GA = np.correlate(goals_against, weights, 'valid')
+
+    return ordinals, proj_GF, proj_GA
+
+
+def lookup_windows(windows, ordinals, N):
+    """
+    return: valid, proj_GF, proj_GA | np.array[bool], np.array*2
+            ---> projections for games on the given dates, from
+                 the last N partition games strictly before them
+    params:
+       windows: tuple    | output of team_windows()
+      ordinals: np.array | date ordinals of the games
+             N: int      | window size
+    """
+    team_ordinals, proj_GF, proj_GA = windows
+
+    # number of partition games strictly before each date
+    k = np.searchsorted(team_ordinals, ordinals, side='left')
+
+    valid = k >= N
+    start = np.where(valid, k - N, 0)
+
+    if not len(proj_GF):
+        return valid, np.zeros(len(k)), np.zeros(len(k))
+
+    return valid, proj_GF[start], proj_GA[start]
+
+
+def team_ewma(team_season, halflife, N, location='all', result='all'):
+    """
+    return: ordinals, proj_GF, proj_GA | np.array*3
+            ---> proj_GF[j] is the EWMA of goals for after the
+                 first j+N partition games (so lookup_windows()
+                 applies unchanged)
+    params:
+      team_season: TeamSeason | team to compute EWMAs for
+         halflife: float      | games for a weight to halve
+                N: int        | minimum number of games
+         location: string     | 'all', 'home', or 'away'
+           result: string     | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+    """
+    ordinals, ewma_for, ewma_against = team_season.get_goals_ewma(halflife, location=location, result=result)
+
+    return (np.array(ordinals,        dtype=np.int64),
+            np.array(ewma_for[N:],     dtype=np.float64),
+            np.array(ewma_against[N:], dtype=np.float64))
+
+
+def projection_suffix(window, location='all', result='all', scheme='constant', halflife=None):
+    """
+    return: string | feature name suffix for a projection setting
+                     e.g. '_w10_all_all_constant' or '_w5_all_all_ewma_h8'
+    params:
+        window: int    | window size (number of games)
+      location: string | 'all', 'home', or 'away'
+        result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+        scheme: string | weighting scheme
+      halflife: float  | half-life for 'exponential'/'ewma' schemes
+    """
+    suffix = '_w'+str(window)+'_'+location+'_'+result+'_'+scheme
+
+    if halflife:
+        suffix += '_h'+str(halflife)
+
+    return suffix
+
+
+def selected_games(season, result='all'):
+    """
+    return: list[Game] | canonical games in at least one of the
+                         two teams' selection for result
+    params:
+      season: Season | season built with Season.add_game()
+      result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+    """
+    games = season.games()
+
+    if result == 'all':
+        return games
+
+    ids = set()
+    for team in season.teams():
+        ids.update(id(g) for g in season.get_team_season(team).get_games(location='all', result=result))
+
+    return [g for g in games if id(g) in ids]
+
+
+def get_projection_grid(season, grid, suffixes=None, weights=None):
+    """
+    Vectorized projections for many (window, location, result,
+    scheme) settings at once; game selections, team masks and goal
+    arrays are built once and shared by all settings using them
+
+    return: list[string] | feature name suffix used for each setting
+    params:
+        season: Season           | season built with Season.add_game()
+          grid: list[tuple]      | (window, location, result, scheme[, halflife])
+                                   settings
+      suffixes: list[string]     | feature name suffixes, one per setting
+                                   (default: projection_suffix())
+       weights: list[float]      | explicit weights for every setting
+                                   (overrides each setting's scheme)
+    """
+    grid = [tuple(setting) for setting in grid]
+
+    if suffixes is None:
+        suffixes = [projection_suffix(*setting) for setting in grid]
+
+    teams = season.teams()
+    index = dict((team, i) for i, team in enumerate(teams))
+
+    # team codes in games ---> TeamSeason keys (e.g. franchises)
+    team_key = season.team_key
+
+    # key = result, value = (selected games, ordinals, per-team
+    #                        positions of home games, of away games)
+    selections = {}
+
+    # key = (location, result, team), value = goal arrays
+    series = {}
+
+    for setting, suffix in zip(grid, suffixes):
+
+        window, location, result, scheme = setting[:4]
+        halflife = setting[4] if len(setting) > 4 else None
+
+        # games and team indices depend only on result
+        if result not in selections:
+            selected = selected_games(season, result)
+            home = np.array([index[team_key(g.home)] for g in selected], dtype=np.int64)
+            away = np.array([index[team_key(g.away)] for g in selected], dtype=np.int64)
+            selections[result] = (selected,
+                                  np.array([g.ordinal for g in selected], dtype=np.int64),
+                                  [np.flatnonzero(home == i) for i in range(len(teams))],
+                                  [np.flatnonzero(away == i) for i in range(len(teams))])
+
+        selected, ordinal, home, away = selections[result]
+
+        if not selected:
+            continue
+
+        if scheme != 'ewma':
+            w = weights if weights is not None else get_weights(window, scheme=scheme, halflife=halflife)
+
+        n = len(selected)
+        proj_home_GF, proj_home_GA = np.zeros(n), np.zeros(n)
+        proj_away_GF, proj_away_GA = np.zeros(n), np.zeros(n)
+        valid_home, valid_away = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+
+        # one correlation per team, shared by its home and away games
+        for i, team in enumerate(teams):
+
+            # running EWMA state (O(1) per game)
+            if scheme == 'ewma':
+                windows = team_ewma(season.get_team_season(team), halflife, window, location=location, result=result)
+
+            # fixed window weights
+            else:
+                key = (location, result, team)
+                if key not in series:
+                    series[key] = team_series(season.get_team_season(team), location=location, result=result)
+
+                windows = team_windows(series[key], w)
+
+            for side, valid, proj_GF, proj_GA in [(home[i], valid_home, proj_home_GF, proj_home_GA),
+                                                  (away[i], valid_away, proj_away_GF, proj_away_GA)]:
+                if len(side):
+                    valid[side], proj_GF[side], proj_GA[side] = lookup_windows(windows, ordinal[side], window)
+
+        proj_diff_score = (proj_home_GF+proj_away_GA)/2.0 - (proj_away_GF+proj_home_GA)/2.0
+
+        # insert into the games where both teams had a full window
+        for j in np.flatnonzero(valid_home & valid_away):
+            selected[j].insert_projections(float(proj_home_GF[j]), float(proj_home_GA[j]),
+                                           float(proj_away_GF[j]), float(proj_away_GA[j]),
+                                           float(proj_diff_score[j]), suffix=suffix)
+
+    return suffixes
+
+
+def get_projections(season, window, location='all', result='all', scheme='constant', weights=None, suffix='', halflife=None):
+    """
+    Vectorized equivalent of Season.get_projections() for a
+    Season built with Season.add_game(); inserts the same
+    proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA
+    and proj_diff_score features into each Game
+
+    params:
+        season: Season      | season to project
+        window: int         | window size (number of games)
+      location: string      | 'all', 'home', or 'away'
+        result: string      | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+        scheme: string      | weighting scheme passed to get_weights()
+       weights: list[float] | explicit weights (overrides scheme)
+        suffix: string      | appended to the feature names
+      halflife: float       | half-life for 'exponential'/'ewma' schemes
+    """
+    get_projection_grid(season, [(window, location, result, scheme, halflife)], suffixes=[suffix], weights=weights)
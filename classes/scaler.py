@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""
+scaler.py
+Author: Brian Boates
+
+Scaler object for hockey prediction
+and analysis package
+
+Feature scaling (x-mean)/span with the column
+statistics kept, so new games can be scaled
+exactly like the training data; statistics are
+updated in one vectorized pass per chunk of rows
+(missing values, NaN, are skipped like pandas does)
+"""
+import json
+import numpy as np
+
+# span of a column: 'half' = (max-min)/2, 'full' = max-min
+SPANS = ['half', 'full']
+
+class Scaler(object):
+    """
+    Scaler object
+
+    fields:
+        span:     string ('half' or 'full')
+        columns:  list[string]
+        count:    int (rows seen)
+        counts:   np.array[int] (non-missing values per column)
+        sums:     np.array[float64]
+        mins:     np.array[float64]
+        maxs:     np.array[float64]
+
+    methods:                                   RETURNS: |
+        __init__(span)                                  | N/A
+        fitted()                                        | bool
+        reset()                                         | N/A
+        partial_fit(data, columns)                      | Scaler
+        fit(data, columns)                              | Scaler
+        fit_chunks(chunks, columns)                     | Scaler
+        mean()                                          | np.array[float64]
+        scale()                                         | np.array[float64]
+        transform(data, columns, out)                   | np.array or pd.DataFrame
+        fit_transform(data, columns)                    | np.array or pd.DataFrame
+        --
+        to_dict()                                       | dict
+        from_dict(d)                                    | Scaler
+        save(path)                                      | N/A
+        load(path)                                      | Scaler
+    """
+    def __init__(self, span='half'):
+        """
+        Initialize Scaler object
+
+        params:
+            span: string | 'half' ((max-min)/2, as Features.scale_feature)
+                           or 'full' (max-min, as utils.scale_feature)
+        """
+        assert span in SPANS, 'span='+str(span)
+
+        self.span = span
+        self.reset()
+
+
+    def reset(self):
+        """
+        Forget all statistics (and column names)
+        """
+        self.columns = []
+        self.count   = 0
+        self.counts = self.sums = self.mins = self.maxs = None
+
+
+    def fitted(self):
+        """
+        return: bool | statistics available or not
+        """
+        return self.count > 0
+
+
+    def _values(self, data, columns=None):
+        """
+        return: np.array[float64], list[string] | 2D values and column names
+        params:
+               data: pd.DataFrame        | columns selected by name
+                     -- OR --
+                     np.array/list[list] | 2D (rows x columns) or 1D data
+            columns: list[string]        | column names (default=the
+                                           DataFrame's, or the fitted ones)
+        """
+        if hasattr(data, 'columns'):
+            if columns is None:
+                columns = list(data.columns)
+            data = data[columns].values
+
+        values = np.asarray(data, dtype=np.float64)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+
+        if columns is None:
+            columns = self.columns or range(values.shape[1])
+
+        assert_msg = str(values.shape[1])+' columns given for '+str(len(columns))+' names'
+        assert values.shape[1] == len(columns), assert_msg
+
+        return values, list(columns)
+
+
+    def partial_fit(self, data, columns=None):
+        """
+        Update the statistics with a chunk of rows
+
+        return: Scaler | self
+        params:
+               data: pd.DataFrame or np.array | chunk of rows
+            columns: list[string]             | column names (see _values)
+        """
+        values, columns = self._values(data, columns)
+
+        if not len(values):
+            return self
+
+        # one pass over all columns, skipping NaN
+        present = ~np.isnan(values)
+        counts = present.sum(axis=0)
+        sums   = np.where(present, values, 0.0).sum(axis=0)
+        mins   = np.where(present, values, np.inf).min(axis=0)
+        maxs   = np.where(present, values, -np.inf).max(axis=0)
+
+        if not self.fitted():
+            self.columns, self.counts, self.sums, self.mins, self.maxs = columns, counts, sums, mins, maxs
+
+        else:
+            assert_msg = 'columns '+str(columns)+' do not match fitted '+str(self.columns)
+            assert columns == self.columns, assert_msg
+
+            self.counts = self.counts + counts
+            self.sums = self.sums + sums
+            self.mins = np.minimum(self.mins, mins)
+            self.maxs = np.maximum(self.maxs, maxs)
+
+        self.count += len(values)
+
+        return self
+
+
+    def fit(self, data, columns=None):
+        """
+        return: Scaler | self, with statistics of data only
+        params:
+            (see partial_fit)
+        """
+        self.reset()
+
+        return self.partial_fit(data, columns)
+
+
+    def fit_chunks(self, chunks, columns=None):
+        """
+        Fit a stream of chunks that need not fit in memory together
+
+        return: Scaler | self
+        params:
+             chunks: iterable | pd.DataFrame or np.array chunks of rows
+            columns: list[string] | column names (see _values)
+        """
+        self.reset()
+
+        for chunk in chunks:
+            self.partial_fit(chunk, columns)
+
+        return self
+
+
+    def mean(self):
+        """
+        return: np.array[float64] | mean of each column
+        """
+        assert self.fitted(), 'Scaler is not fitted'
+
+        return self.sums / np.maximum(self.counts, 1).astype(np.float64)
+
+
+    def scale(self):
+        """
+        return: np.array[float64] | span of each column (1.0 for
+                                    constant or empty columns)
+        """
+        assert self.fitted(), 'Scaler is not fitted'
+
+        span = self.maxs - self.mins
+        if self.span == 'half':
+            span = span / 2.0
+
+        return np.where(np.isfinite(span) & (span > 0), span, 1.0)
+
+
+    def transform(self, data, columns=None, out=None):
+        """
+        return: np.array[float64] | scaled data (2D)
+                -- OR (if data is a DataFrame) --
+                pd.DataFrame      | copy with the columns scaled
+        params:
+               data: pd.DataFrame or np.array | data to scale
+            columns: list[string]             | columns of data, any subset
+                                                of the fitted ones
+                out: np.array                 | array to write the scaled
+                                                values to (may be data)
+        """
+        assert self.fitted(), 'Scaler is not fitted'
+
+        frame = data if hasattr(data, 'columns') else None
+
+        values, columns = self._values(data, columns)
+
+        index = [self.columns.index(c) for c in columns]
+
+        if out is None:
+            out = np.empty_like(values)
+        elif out.ndim == 1:
+            out = out.reshape(-1, 1)
+
+        np.subtract(values, self.mean()[index], out=out)
+        np.divide(out, self.scale()[index], out=out)
+
+        if frame is not None:
+            frame = frame.copy()
+            for j, name in enumerate(columns):
+                frame[name] = out[:, j]
+            return frame
+
+        return out
+
+
+    def fit_transform(self, data, columns=None):
+        """
+        return: np.array or pd.DataFrame | data scaled by its own statistics
+        params:
+            (see transform)
+        """
+        return self.fit(data, columns).transform(data, columns)
+
+
+    def to_dict(self):
+        """
+        return: dict | JSON-serializable statistics
+        """
+        d = {'span': self.span, 'columns': list(self.columns), 'count': self.count}
+
+        if self.fitted():
+            d.update(counts=self.counts.tolist(), sums=self.sums.tolist(),
+                     mins=self.mins.tolist(), maxs=self.maxs.tolist())
+
+        return d
+
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        return: Scaler | rebuilt from to_dict() output
+        """
+        scaler = cls(span=d['span'])
+
+        if d['count']:
+            scaler.columns = list(d['columns'])
+            scaler.count   = d['count']
+            scaler.counts = np.array(d['counts'], dtype=np.int64)
+            scaler.sums = np.array(d['sums'], dtype=np.float64)
+            scaler.mins = np.array(d['mins'], dtype=np.float64)
+            scaler.maxs = np.array(d['maxs'], dtype=np.float64)
+
+        return scaler
+
+
+    def save(self, path):
+        """
+        Write the statistics to path as JSON
+        """
+        out = open(path, 'w')
+        json.dump(self.to_dict(), out)
+        out.close()
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        return: Scaler | read from a file written by save()
+        """
+        f = open(path)
+        scaler = cls.from_dict(json.load(f))
+        f.close()
+
+        return scaler
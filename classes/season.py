@@ -6,29 +6,82 @@ Author: Brian Boates
 Season object for hockey analysis and 
 prediction package
 """
-from utils import get_weights
-from game import Game
+import heapq
+import bisect
+import projections
+from game import Game, date_ordinal
+from team_season import TeamSeason, SCHEMES
+
+# features inserted by get_projections (before any suffix)
+PROJECTIONS = ['proj_home_GF', 'proj_home_GA', 'proj_away_GF', 'proj_away_GA', 'proj_diff_score']
+
+def _extend_streak(streak, outcome):
+    """
+    return: int | streak after a game with given outcome
+    params:
+       streak: int | current streak (pos=winning, neg=losing)
+      outcome: int | +1 (extends winning), -1 (extends losing)
+                     or 0 (breaks the streak)
+    """
+    if outcome > 0:
+        return streak + 1 if streak > 0 else 1
+    elif outcome < 0:
+        return streak - 1 if streak < 0 else -1
+    else:
+        return 0
+
+
+def _keyed_games(games, i):
+    """
+    yield: (ordinal, i, position, Game) | sortable keys for a team's
+                                          games; ties keep team order
+    params:
+        games: list[Game] | date-ordered games
+            i: int        | index of the team
+    """
+    for j, g in enumerate(games):
+        yield g.ordinal, i, j, g
+
 
 class Season():
     """
     Season object
     fields:
        season: string
+     checksum: string (hash of the source data, if known)
           all: dict[string:TeamSeason]
+        games: list[Game] (canonical store, one Game per game)
+     schedule: list[tuple] (unplayed games, see schedule_game)
     methods:
         insert(teamSeason)
+        add_game(record)
+        insert_game(g)
+        set_state(games, team_states)
+        games()
         teams()
+        team_key(team)
         get_team_season(team)
-        get_projections(N, location, result, scheme)
-        get_streaks(location, result)
-        all_games()
+        get_projections(N, location, result, scheme, engine, suffix, halflife, cache)
+        get_projection_grid(grid, engine)
+        get_streaks(location, result, variants, cache)
+        iter_games(feature_names)
+        all_games(feature_names)
+        schedule_game(date, away, home)
+        next_game(team, after)
+        matchup_features(away, home, date, window, location, result, scheme, halflife, variants, suffix)
+        ingest_result(record, window, location, result, scheme, halflife, variants, suffix)
     """
     def __init__(self, season='None'):
         """
         Initialize Season object
         """
-        self.season = season
-        self._all   = {}
+        self.season   = season
+        self.checksum = None
+        self._all     = {}
+        self._games   = []
+        
+        # sorted (ordinal, date, away, home) of unplayed games
+        self._schedule = []
     
     
     def insert(self, team_season):
@@ -38,6 +91,88 @@ class Season():
         self._all[team_season.team] = team_season
     
     
+    def add_game(self, record):
+        """
+        Create a Game once, store it in the canonical game
+        store and insert the same object into both teams'
+        TeamSeasons (created if not yet present)
+        
+        return: Game | the stored game
+        params:
+            record: tuple | (date, away, home, away_goals, home_goals, result)
+        """
+        g = Game(record=record)
+        
+        self.insert_game(g)
+        
+        return g
+    
+    
+    def insert_game(self, g):
+        """
+        Store an existing Game in the canonical game store and
+        insert it into both teams' TeamSeasons (created if not
+        yet present)
+        
+        params:
+            g: Game | game to store
+        """
+        self._games.append(g)
+        
+        # no longer the source data the checksum was taken of
+        self.checksum = None
+        
+        for code in (g.away, g.home):
+            
+            team = self.team_key(code)
+            
+            if team not in self._all:
+                self.insert( self._new_team_season(team) )
+            
+            self._all[team].insert(g)
+    
+    
+    def set_state(self, games, team_states):
+        """
+        Fill an empty Season from previously built state (see
+        cache.loadSeasonCached) instead of inserting every game
+        
+        params:
+                  games: list[Game] | canonical game store, in insertion order
+            team_states: dict       | team ---> TeamSeason.set_state() state
+        """
+        self._games = list(games)
+        self.checksum = None
+        
+        for team in team_states:
+            team_season = self._new_team_season(team)
+            team_season.set_state(team_states[team])
+            self.insert(team_season)
+    
+    
+    def _new_team_season(self, team):
+        """
+        return: TeamSeason | empty TeamSeason for team
+        """
+        return TeamSeason(season=self.season, team=team)
+    
+    
+    def team_key(self, team):
+        """
+        return: string | key of the TeamSeason holding team's games
+                         (the team code itself for a Season)
+        """
+        return team
+    
+    
+    def games(self):
+        """
+        return: list[Game] | canonical store of games in insertion order
+                             (empty if TeamSeasons were inserted directly)
+        """
+        return self._games
+    
+    
     def teams(self):
         """
         return: sorted list of teams present in Season
@@ -49,10 +184,10 @@ class Season():
         """
         return: TeamSeason | object for given team's season
         """
-        return self._all[team]
+        return self._all[self.team_key(team)]
     
     
-    def get_projections(self, window, location='all', result='all', scheme='constant'):
+    def get_projections(self, window, location='all', result='all', scheme='constant', engine='python', suffix='', halflife=None, cache=None):
         """
         Insert projections into each Game: 
             proj_home_GF, proj_away_GF, proj_home_GA, proj_away_GA, proj_diff_score
@@ -64,7 +199,19 @@ class Season():
                              'all', 'home', or 'away' (default='all')
             result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
             scheme: string | weighting scheme: default='constant'
-                             options are 'constant' or 'linear'
+                             options are 'constant', 'linear',
+                             'exponential' (fixed window, weights halve
+                             every halflife games) or 'ewma' (running
+                             EWMA over all previous games, updated in
+                             O(1) per game; window = minimum games)
+            engine: string | 'python' (per game) or 'numpy' (vectorized,
+                             see projections.py; needs the canonical
+                             game store, i.e. Season.add_game)
+            suffix: string | appended to the feature names (default='')
+          halflife: float  | half-life in games for 'exponential'/'ewma'
+             cache: FeatureCache | load the features from / save them to
+                                   a cache.FeatureCache (needs checksum and
+                                   the canonical game store)
         """
         # location must be all, home, or away
         assert location in ['all', 'home', 'away'], 'location='+str(location)
@@ -72,11 +219,31 @@ class Season():
         # result must be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
         assert result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO'], 'result='+str(result)
         
-        # scheme must be 'constant' or 'linear'
-        assert scheme in ['constant', 'linear'], 'scheme='+str(scheme)
+        # scheme must be 'constant', 'linear', 'exponential' or 'ewma'
+        assert scheme in SCHEMES, 'scheme='+str(scheme)
+        
+        # decaying schemes need a half-life
+        assert scheme in ['constant', 'linear'] or halflife > 0, 'halflife='+str(halflife)
         
-        # get the projection weights
-        weights = get_weights(window, scheme=scheme)
+        # engine must be 'python' or 'numpy'
+        assert engine in ['python', 'numpy'], 'engine='+str(engine)
+        
+        # previously computed for this data and parameters
+        if cache is not None:
+            params = ('projections', window, location, result, scheme, halflife, suffix)
+            names  = [name+suffix for name in PROJECTIONS]
+            compute = lambda: Season.get_projections(self, window, location=location, result=result, scheme=scheme,
+                                                     engine=engine, suffix=suffix, halflife=halflife)
+            self._cached(cache, params, names, compute)
+            return
+        
+        # whole-season vectorized projections
+        if engine == 'numpy' and self._games:
+            projections.get_projections(self, window, location=location, result=result, scheme=scheme, suffix=suffix, halflife=halflife)
+            return
+        
+        # ids of games already projected (shared Games are seen twice)
+        done = set()
         
         # loop over teams in Season
         for team in self.teams():
@@ -90,57 +257,114 @@ class Season():
             # loop over team's games
             for g in games:
                 
-                # date of the game
-                date = g.date
+                # both perspectives give the same projections
+                if id(g) in done:
+                    continue
+                done.add(id(g))
                 
-                # if current team is home team
-                if team == g.home:
-                    
-                    # get opponent's TeamSeason
-                    team_season_opponent = self.get_team_season(g.away)
-                    
-                    # get goals lists for home and away teams
-                    home_GF_list, home_GA_list =          team_season.get_goals_lists(window, location=location, result=result, before=date)
-                    away_GF_list, away_GA_list = team_season_opponent.get_goals_lists(window, location=location, result=result, before=date)
+                # date of the game (as ordinal for binary search)
+                date = g.ordinal
                 
-                # if current team is away team
-                if team == g.away:
-                    
-                    # get opponent's TeamSeason
-                    team_season_opponent = self.get_team_season(g.home)
-                    
-                    # get goals lists for home and away teams
-                    away_GF_list, away_GA_list =          team_season.get_goals_lists(window, location=location, result=result, before=date)
-                    home_GF_list, home_GA_list = team_season_opponent.get_goals_lists(window, location=location, result=result, before=date)                    
+                # get home and away TeamSeasons
+                home_team_season = self.get_team_season(g.home)
+                away_team_season = self.get_team_season(g.away)
+                
+                # weighted goals for/against over each team's window
+                home_window = home_team_season.get_goals_window(window, location=location, result=result, before=date, scheme=scheme, halflife=halflife)
+                away_window = away_team_season.get_goals_window(window, location=location, result=result, before=date, scheme=scheme, halflife=halflife)
                 
                 # make sure N prior games were available for both teams
-                if home_GF_list and home_GA_list and away_GF_list and away_GA_list:
+                if home_window and away_window:
                     
-                    # initialize projection variables
-                    proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA = 0.0, 0.0, 0.0, 0.0
+                    # the projections
+                    proj_home_GF, proj_home_GA = home_window
+                    proj_away_GF, proj_away_GA = away_window
                     
-                    # loop over window size
-                    for i in range(window):
-                        
-                        # compute the projections
-                        proj_home_GF += home_GF_list[i] * weights[i]
-                        proj_home_GA += home_GA_list[i] * weights[i]
-                        proj_away_GF += away_GF_list[i] * weights[i]
-                        proj_away_GA += away_GA_list[i] * weights[i]
-                        
                     # compute the projected score differential
                     proj_diff_score = (proj_home_GF+proj_away_GA)/2.0 - (proj_away_GF+proj_home_GA)/2.0
                     
                     # add projected data to the Game object
-                    g.insert_projections(proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA, proj_diff_score)
+                    g.insert_projections(proj_home_GF, proj_home_GA, proj_away_GF, proj_away_GA, proj_diff_score, suffix=suffix)
     
     
-    def get_streaks(self, location='all', result='all'):
+    def get_projection_grid(self, grid, engine='numpy'):
         """
+        Insert projections for every (window, location, result, scheme)
+        setting in grid, each under its own feature names, e.g.
+        proj_diff_score_w10_all_all_constant (see projection_suffix)
+        
+        With engine='numpy' the sorted game partitions, game selections
+        and goal arrays are built once and shared by all settings
+        
+        return: list[string] | feature name suffix for each setting
+        params:
+            grid: list[tuple] | (window, location, result, scheme) settings,
+                                e.g. itertools.product([5, 10], ['all'],
+                                ['all', 'R'], ['constant', 'linear']);
+                                'exponential' and 'ewma' settings take
+                                a fifth entry, the halflife
+          engine: string      | 'python' or 'numpy' (default='numpy')
+        """
+        grid = [tuple(setting) for setting in grid]
+        
+        for setting in grid:
+            
+            window, location, result, scheme = setting[:4]
+            halflife = setting[4] if len(setting) > 4 else None
+            
+            # location must be all, home, or away
+            assert location in ['all', 'home', 'away'], 'location='+str(location)
+            
+            # result must be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+            assert result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO'], 'result='+str(result)
+            
+            # scheme must be 'constant', 'linear', 'exponential' or 'ewma'
+            assert scheme in SCHEMES, 'scheme='+str(scheme)
+            
+            # decaying schemes need a half-life
+            assert scheme in ['constant', 'linear'] or halflife > 0, 'halflife='+str(halflife)
+        
+        # engine must be 'python' or 'numpy'
+        assert engine in ['python', 'numpy'], 'engine='+str(engine)
+        
+        suffixes = [projections.projection_suffix(*setting) for setting in grid]
+        
+        if engine == 'numpy' and self._games:
+            projections.get_projection_grid(self, grid, suffixes=suffixes)
+        
+        else:
+            for setting, suffix in zip(grid, suffixes):
+                window, location, result, scheme = setting[:4]
+                halflife = setting[4] if len(setting) > 4 else None
+                self.get_projections(window, location=location, result=result, scheme=scheme,
+                                     engine='python', suffix=suffix, halflife=halflife)
+        
+        return suffixes
+    
+    
+    def get_streaks(self, location='all', result='all', variants=False, cache=None):
+        """
+        Insert streaks coming into each Game (home_streak, away_streak,
+        diff_streak) with a single chronological pass per team
+        
+        Win/loss streaks skip each team's first selected game, as the
+        original backwards walk did. With variants, the same pass also
+        inserts (as <home|away|diff>_<kind>_streak):
+            point: games with a point (+) / regulation losses (-)
+              reg: regulation wins (+) / regulation losses (-),
+                   broken by OT/SO games
+            venue: wins (+) / losses (-) in previous games at the
+                   same venue (home or away) as the Game
+        
         params:
           location: string | location of games to include in projections
                              'all', 'home', or 'away' (default='all')
             result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+          variants: bool   | also insert point/reg/venue streaks or not
+                             (default=False)
+             cache: FeatureCache | load the streaks from / save them to
+                                   a cache.FeatureCache (needs checksum and
+                                   the canonical game store)
         """
         # location must be all, home, or away
         assert location in ['all', 'home', 'away'], 'location='+str(location)
@@ -148,58 +372,117 @@ class Season():
         # result must be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
         assert result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO'], 'result='+str(result)
         
+        # previously computed for this data and parameters
+        if cache is not None:
+            kinds = [''] + (['_point', '_reg', '_venue'] if variants else [])
+            names = [side+kind+'_streak' for kind in kinds for side in ['home', 'away', 'diff']]
+            compute = lambda: Season.get_streaks(self, location=location, result=result, variants=variants)
+            self._cached(cache, ('streaks', location, result, variants), names, compute)
+            return
+        
         # loop over all teams in season
         for team in self.teams():
             
             # get current TeamSeason
             team_season = self.get_team_season(team)
             
-            # get all prior games for team
+            # get all games for team, in date order
             games = team_season.get_games(location=location, result=result)
             
+            # running streaks coming into the next game
+            streak, point, reg = 0, 0, 0
+            venue = {'home': 0, 'away': 0}
+            
             # loop through team's games
             for i, g in enumerate(games):
                 
-                # initialize streak
-                streak = 0
+                side = team_season.side(g)
                 
-                # if first game, team has no streak
-                if i == 0: streak = 0
+                #### INSERT STREAKS INTO Game OBJECTS ####
                 
-                else:
-                    # if team won its last game
-                    if team == games[i-1].winner():
-                        # loop over previous game outcomes until team didn't win
-                        k = 1
-                        while team == games[i-k].winner() and i-k > 0:
-                            streak += 1
-                            k += 1
-                    
-                    # if team lost its last game
-                    elif team == games[i-1].loser():
-                        # loop over previous game outcomes until team didn't lose
-                        k = 1
-                        while team == games[i-k].loser() and i-k > 0:
-                            streak += -1
-                            k += 1
+                # Seasons built from separate TeamSeasons hold a copy
+                # of the game in the opponent's TeamSeason as well
+                copies = [g]
+                if not self._games:
+                    opponent = g.away if side == 'home' else g.home
+                    copies.append( self.get_team_season(opponent).game_on_date(g.date) )
                 
-                #### INSERT STREAK INTO Game OBJECTS ####
+                for c in copies:
+                    c.insert_streak(streak, location=side)
+                    if variants:
+                        c.insert_streak(point,       location=side, kind='point')
+                        c.insert_streak(reg,         location=side, kind='reg')
+                        c.insert_streak(venue[side], location=side, kind='venue')
                 
-                if team == g.home:
-                    # insert streak into Game
-                    g.insert_streak(streak, location='home')                    
-                    # also insert into the copy of the game 
-                    # in the opponent's TeamSeason
-                    opponent_game = self.get_team_season(g.away).game_on_date(g.date)
-                    opponent_game.insert_streak(streak, location='home')
-                    
-                elif team == g.away:
-                    # insert streak into Game
-                    g.insert_streak(streak, location='away')
-                    # also insert into the copy of the game 
-                    # in the opponent's TeamSeason
-                    opponent_game = self.get_team_season(g.home).game_on_date(g.date)
-                    opponent_game.insert_streak(streak, location='away')
+                #### UPDATE STREAKS WITH THIS GAME ####
+                
+                # +1 win, -1 loss, 0 neither
+                outcome = team_season.outcome(g)
+                
+                # the first game never counts towards the win/loss streak
+                streak = _extend_streak(streak, outcome) if i > 0 else 0
+                
+                if variants:
+                    regulation = g.ended_in_regulation()
+                    point = _extend_streak(point, -1 if regulation and outcome < 0 else 1)
+                    reg   = _extend_streak(reg, outcome if regulation else 0)
+                    venue[side] = _extend_streak(venue[side], outcome)
+    
+    
+    def _cached(self, cache, params, names, compute):
+        """
+        Insert the named features from cache, or compute() them and
+        store their columns (one value per game in the canonical
+        store); without a checksum or game store just compute()
+        
+        params:
+            cache: FeatureCache | see cache.FeatureCache
+           params: tuple        | parameters the features depend on
+            names: list[string] | features compute() inserts
+          compute: function     | inserts the features, uncached
+        """
+        if not self.checksum or not self._games:
+            compute()
+            return
+        
+        columns = cache.load(self.season, self.checksum, params)
+        
+        if columns is None:
+            compute()
+            columns = dict((name, [g.features.get(name) for g in self._games]) for name in names)
+            cache.save(self.season, self.checksum, params, columns)
+            return
+        
+        for name in names:
+            for g, value in zip(self._games, columns[name]):
+                if value is not None:
+                    g.features[name] = value
+    
+    
+    def iter_games(self, feature_names=[]):
+        """
+        yield: Game | games in chronological order, lazily merged
+                      from each team's (already sorted) home games
+        params:
+            feature_names: list[string] | only yield games that have
+                                          all of these features
+        """
+        # one date-ordered stream per team; home games avoid duplicates
+        streams = []
+        for i, team in enumerate(self.teams()):
+            home_games = self.get_team_season(team).get_games(location='home')
+            streams.append( _keyed_games(home_games, i) )
+        
+        # k-way merge over the team streams
+        for ordinal, i, j, g in heapq.merge(*streams):
+            
+            # check only the requested features
+            if feature_names:
+                features = g.features
+                if not all(f in features for f in feature_names):
+                    continue
+            
+            yield g
     
     
     def all_games(self, feature_names=[]):
@@ -208,35 +491,180 @@ class Season():
         params:
             feature_names: list[string] | list of feature names
         """
-        # initialize list to hold all games
-        game_list = []
+        return list( self.iter_games(feature_names) )
+    
+    
+    def schedule_game(self, date, away, home):
+        """
+        Add an unplayed game to the schedule (see ingest_result)
         
-        # loop over all teams in season
-        for team in self.teams():
-            
-            # get TeamSeason for team
-            team_season = self.get_team_season(team)
-            
-            # if specific features requested
-            if feature_names:
-                # consider only home games to avoid duplicates
-                g_list = team_season.get_games(location='home')
-                # append only games with all features
-                game_list += [g for g in g_list if not [f for f in feature_names if f not in g.features]]
+        params:
+            date: string | date string e.g. '2012-03-01'
+            away: string | away team
+            home: string | home team
+        """
+        bisect.insort(self._schedule, (date_ordinal(date), str(date), away, home))
+    
+    
+    def next_game(self, team, after=None):
+        """
+        return: tuple | (date, away, home) of team's next scheduled
+                        game on or after the after date, None if none
+        params:
+             team: string | team (or any of its codes)
+            after: string | date string e.g. '2012-03-01' (or date ordinal)
+                            (default=None, the whole schedule)
+        """
+        lo = 0
+        if after:
+            if not isinstance(after, int): after = date_ordinal(after)
+            lo = bisect.bisect_left(self._schedule, (after,))
+        
+        key = self.team_key(team)
+        for ordinal, date, away, home in self._schedule[lo:]:
+            if key in (self.team_key(away), self.team_key(home)):
+                return date, away, home
+        
+        return None
+    
+    
+    def matchup_features(self, away, home, date, window=10, location='all', result='all', scheme='constant', halflife=None, variants=False, suffix=''):
+        """
+        Features for away at home on date from the teams' current
+        state (the same names and values get_projections() and
+        get_streaks() would insert), in O(log n) plus the streak
+        lengths; projections are left out if either team has fewer
+        than window prior games, and for location='home' ('away')
+        only the home (away) streaks are given, as get_streaks()
+        inserts them (with a result filter get_streaks() also skips
+        games outside the team's selected results, which a pre-game
+        query cannot know)
+        
+        return: dict[string:float] | feature name ---> value
+        params:
+              away: string | away team
+              home: string | home team
+              date: string | date string e.g. '2012-03-01' (or date ordinal)
+            window: int    | window size (number of games) (default=10)
+          location: string | 'all', 'home', or 'away' (default='all')
+            result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+            scheme: string | weighting scheme (default='constant')
+          halflife: float  | half-life in games for 'exponential'/'ewma'
+          variants: bool   | include point/reg/venue streaks or not
+                             (default=False)
+            suffix: string | appended to the projection feature names
+        """
+        return self._matchup_features(self.get_team_season(away), self.get_team_season(home), date,
+                                      window=window, location=location, result=result, scheme=scheme,
+                                      halflife=halflife, variants=variants, suffix=suffix)
+    
+    
+    def _matchup_features(self, away_season, home_season, date, window=10, location='all', result='all', scheme='constant', halflife=None, variants=False, suffix=''):
+        """
+        matchup_features() from the two teams' TeamSeasons (read only)
+        
+        return: dict[string:float] | feature name ---> value
+        params:
+            away_season: TeamSeason | away team's state
+            home_season: TeamSeason | home team's state
+            (others as in matchup_features)
+        """
+        # location must be all, home, or away
+        assert location in ['all', 'home', 'away'], 'location='+str(location)
+        
+        # result must be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+        assert result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO'], 'result='+str(result)
+        
+        before = date if isinstance(date, int) else date_ordinal(date)
+        
+        teams = {'home': home_season, 'away': away_season}
+        
+        features = {}
+        
+        #### PROJECTIONS ####
+        
+        home_window = teams['home'].get_goals_window(window, location=location, result=result, before=before, scheme=scheme, halflife=halflife)
+        away_window = teams['away'].get_goals_window(window, location=location, result=result, before=before, scheme=scheme, halflife=halflife)
+        
+        if home_window and away_window:
+            proj_home_GF, proj_home_GA = home_window
+            proj_away_GF, proj_away_GA = away_window
             
-            # if features not specified
-            else:
-                # only append team's home games (avoids duplicates)
-                game_list += team_season.get_games(location='home')
+            features['proj_home_GF'+suffix]    = proj_home_GF
+            features['proj_home_GA'+suffix]    = proj_home_GA
+            features['proj_away_GF'+suffix]    = proj_away_GF
+            features['proj_away_GA'+suffix]    = proj_away_GA
+            features['proj_diff_score'+suffix] = (proj_home_GF+proj_away_GA)/2.0 - (proj_away_GF+proj_home_GA)/2.0
+        
+        #### STREAKS ####
+        
+        kinds = [None, 'point', 'reg', 'venue'] if variants else [None]
+        
+        # as get_streaks: only the home (away) team's streak over its
+        # home (away) games for location='home' ('away'), no difference
+        sides = ['home', 'away'] if location == 'all' else [location]
+        
+        for kind in kinds:
+            name = '_'+kind+'_streak' if kind else '_streak'
             
-        # sort the game_list by date
-        game_list = sorted(game_list, key=Game.get_date)
+            for side in sides:
+                
+                # venue streaks only cover games at the same venue
+                venue = side if kind == 'venue' else location
+                
+                features[side+name] = teams[side].current_streak(before, location=venue, result=result, kind=kind)
             
-        return game_list
+            if len(sides) == 2:
+                features['diff'+name] = features['home'+name] - features['away'+name]
+        
+        return features
     
-
-
-
-
-
-
+    
+    def ingest_result(self, record, window=10, location='all', result='all', scheme='constant', halflife=None, variants=False, suffix=''):
+        """
+        Online update for one new result: the game gets its pre-game
+        features, is inserted into the two teams' state (O(1) for
+        in-order games, nothing else is recomputed) and is removed
+        from the schedule
+        
+        return: dict[tuple:dict] | (date, away, home) ---> matchup_features()
+                                   for each team's next scheduled game
+        params:
+            record: tuple | (date, away, home, away_goals, home_goals, result)
+            (others as in matchup_features)
+        """
+        params = dict(window=window, location=location, result=result, scheme=scheme,
+                      halflife=halflife, variants=variants, suffix=suffix)
+        
+        return self._ingest(record, params)
+    
+    
+    def _ingest(self, record, params):
+        """
+        ingest_result() with the matchup_features() keyword
+        arguments collected in params
+        """
+        g = Game(record=record)
+        
+        # features coming into the game (only needs the two teams' history)
+        if self.team_key(g.away) in self._all and self.team_key(g.home) in self._all:
+            g.features.update( self.matchup_features(g.away, g.home, g.ordinal, **params) )
+        
+        self.insert_game(g)
+        
+        # played: no longer scheduled
+        fixture = (g.ordinal, g.date, g.away, g.home)
+        i = bisect.bisect_left(self._schedule, fixture)
+        if i < len(self._schedule) and self._schedule[i] == fixture:
+            del self._schedule[i]
+        
+        # features for both teams' next games
+        upcoming = {}
+        for team in (g.away, g.home):
+            fixture = self.next_game(team, after=g.ordinal)
+            if fixture and fixture not in upcoming:
+                date, away, home = fixture
+                if self.team_key(away) in self._all and self.team_key(home) in self._all:
+                    upcoming[fixture] = self.matchup_features(away, home, date, **params)
+        
+        return upcoming
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+season_test.py
+Author: Brian Boates
+"""
+import os
+import sys
+import random
+import numpy as np
+
+# import through the package (as main does)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from classes.season import Season
+
+def make_season(num_days=60, seed=0):
+    """
+    return: Season | small hand-built season: 4 teams, two
+                     games a day, with R, OT and SO results
+    """
+    rng = random.Random(seed)
+    teams = ['BOS', 'MTL', 'PHI', 'TOR']
+
+    season = Season('2011_2012')
+    for day in range(num_days):
+        date = '2011-%02d-%02d' % (10 + day // 28, 1 + day % 28)
+        order = rng.sample(teams, 4)
+        for away, home in [order[:2], order[2:]]:
+            result = rng.choice(['R', 'R', 'R', 'OT', 'SO'])
+            goals = rng.randint(0, 5)
+            winner = goals + 1
+            if rng.random() < 0.5:
+                season.add_game((date, away, home, winner, goals, result))
+            else:
+                season.add_game((date, away, home, goals, winner, result))
+
+    return season
+
+
+def projections(season):
+    """
+    return: list[dict] | projection features of each game
+    """
+    return [dict((k, v) for k, v in g.features.items() if k.startswith('proj_')) for g in season.games()]
+
+
+def test_projections(window=3):
+    passed = 'passed: Season.get_projections() numpy engine'
+    failed = 'failed: Season.get_projections() numpy engine'
+    try:
+        same = True
+        for location in ['all', 'home', 'away']:
+            for result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO']:
+                for scheme, halflife in [('constant', None), ('linear', None), ('exponential', 2.0), ('ewma', 2.0)]:
+                    expected, actual = make_season(), make_season()
+                    expected.get_projections(window, location=location, result=result, scheme=scheme, halflife=halflife, engine='python')
+                    actual.get_projections(window, location=location, result=result, scheme=scheme, halflife=halflife, engine='numpy')
+                    # windows must fill for some games
+                    if not any(projections(actual)):
+                        same = False
+                    for e, a in zip(projections(expected), projections(actual)):
+                        if sorted(e) != sorted(a) or not np.allclose([e[k] for k in sorted(e)], [a[k] for k in sorted(e)], rtol=0, atol=1e-9):
+                            same = False
+        if same:
+            print passed
+        else: print failed
+    except:
+        print failed
+
+
+def main():
+
+    # perform all method tests
+    test_projections()
+
+
+if __name__ == '__main__':
+    main()
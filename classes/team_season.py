@@ -6,28 +6,182 @@ Author: Brian Boates
 TeamSeason object for hockey analysis and 
 prediction package
 """
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from utils import get_weights, get_decay
+from game import date_ordinal
+
+LOCATIONS = ['all', 'home', 'away']
+RESULTS   = ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO']
+SCHEMES   = ['constant', 'linear', 'exponential', 'ewma']
+
+class _Partition(object):
+    """
+    Sorted games for one (location, result) pair with parallel
+    date ordinals, goals lists and prefix sums:
+          cum_for[j] = sum(goals_for[:j])
+        icum_for[j] = sum(i*goals_for[i] for i < j)
+    (likewise for goals against) and running EWMA states
+    per smoothing factor, built on first use
+    """
+    __slots__ = ['games', 'ordinals', 'goals_for', 'goals_against',
+                 'cum_for', 'cum_against', 'icum_for', 'icum_against', 'ewma']
+    
+    def __init__(self):
+        self.games, self.ordinals = [], []
+        self.goals_for, self.goals_against = [], []
+        self.cum_for, self.cum_against = [0], [0]
+        self.icum_for, self.icum_against = [0], [0]
+        
+        # key = alpha, value = (ewma_for, ewma_against)
+        self.ewma = {}
+    
+    
+    def insert(self, g, goals_for, goals_against):
+        """
+        Insert game keeping date order; prefix sums are extended
+        in O(1) for in-order games, rebuilt from the insertion
+        point otherwise
+        """
+        i = len(self.ordinals)
+        if self.ordinals and g.ordinal < self.ordinals[-1]:
+            i = bisect_right(self.ordinals, g.ordinal)
+        
+        self.games.insert(i, g)
+        self.ordinals.insert(i, g.ordinal)
+        self.goals_for.insert(i, goals_for)
+        self.goals_against.insert(i, goals_against)
+        
+        # drop stale sums past the insertion point and extend
+        del self.cum_for[i+1:], self.cum_against[i+1:]
+        del self.icum_for[i+1:], self.icum_against[i+1:]
+        for j in range(i, len(self.games)):
+            self.cum_for.append(self.cum_for[j] + self.goals_for[j])
+            self.cum_against.append(self.cum_against[j] + self.goals_against[j])
+            self.icum_for.append(self.icum_for[j] + j*self.goals_for[j])
+            self.icum_against.append(self.icum_against[j] + j*self.goals_against[j])
+        
+        # EWMA states: O(1) update in order, rebuilt lazily otherwise
+        if i == len(self.games) - 1:
+            for alpha, (ewma_for, ewma_against) in self.ewma.items():
+                self._extend_ewma(alpha, ewma_for, ewma_against, i)
+        else:
+            self.ewma.clear()
+    
+    
+    def restore(self, games, goals_for, goals_against, sums=None, ordinals=None):
+        """
+        Replace the contents with games already in date order
+        (e.g. read back from a cache) without inserting them one
+        by one; the lists given are kept, not copied, and prefix
+        sums and ordinals are rebuilt unless given
+        
+        params:
+                    games: list[Game] | games in date order
+                goals_for: list[int]  | goals for in each game
+            goals_against: list[int]  | goals against in each game
+                     sums: tuple      | (cum_for, cum_against, icum_for,
+                                         icum_against), see _Partition
+                 ordinals: list[int]  | date ordinal of each game
+        """
+        if ordinals is None:
+            ordinals = map(attrgetter('ordinal'), games)
+        
+        self.games, self.ordinals = games, ordinals
+        self.goals_for, self.goals_against = goals_for, goals_against
+        
+        if sums is None:
+            cum_for, cum_against, icum_for, icum_against = [0], [0], [0], [0]
+            for j in range(len(games)):
+                cum_for.append(cum_for[j] + goals_for[j])
+                cum_against.append(cum_against[j] + goals_against[j])
+                icum_for.append(icum_for[j] + j*goals_for[j])
+                icum_against.append(icum_against[j] + j*goals_against[j])
+            sums = (cum_for, cum_against, icum_for, icum_against)
+        
+        self.cum_for, self.cum_against, self.icum_for, self.icum_against = sums
+        
+        self.ewma = {}
+    
+    
+    def _extend_ewma(self, alpha, ewma_for, ewma_against, j):
+        """
+        Append the EWMA state after game j (the first game seeds it)
+        """
+        if j == 0:
+            ewma_for.append(float(self.goals_for[0]))
+            ewma_against.append(float(self.goals_against[0]))
+        else:
+            ewma_for.append(alpha*self.goals_for[j] + (1.0-alpha)*ewma_for[j])
+            ewma_against.append(alpha*self.goals_against[j] + (1.0-alpha)*ewma_against[j])
+    
+    
+    def ewma_series(self, alpha):
+        """
+        return: ewma_for, ewma_against | list[float], list[float]
+                ---> EWMA state after j games at index j
+                     (index 0 is a 0.0 placeholder)
+        """
+        if alpha not in self.ewma:
+            ewma_for, ewma_against = [0.0], [0.0]
+            for j in range(len(self.games)):
+                self._extend_ewma(alpha, ewma_for, ewma_against, j)
+            self.ewma[alpha] = (ewma_for, ewma_against)
+        
+        return self.ewma[alpha]
+
 
 class TeamSeason():
     """
     TeamSeason object
+    
+    Games are indexed on insertion into sorted partitions, one per
+    (location, result) pair, each with a parallel list of date
+    ordinals so before/after cut-offs are found by binary search,
+    and prefix sums of goals for/against for O(1) windows
+    
     fields:
        season: string
        team:   string
-       games:  list[Game]
+       codes:  set[string] (team plus any aliases, e.g. a
+                            relocated franchise's old code)
+       games:  list[Game] (references, shared with the
+                           opponent when built by Season.add_game)
     methods:
        insert()
+       get_state()
+       set_state(state)
+       code(g)
+       side(g)
+       outcome(g)
        game_on_date(date)
        get_games(location, result, before, after)
        num_games(location, result, before, after)
        get_goals_lists(N, location, result, before)
+       get_goals_window(N, location, result, before, scheme, halflife)
+       get_goals_series(location, result)
+       get_goals_ewma(halflife, location, result)
+       current_streak(before, location, result, kind)
     """
-    def __init__(self, season='None', team='None'):
+    def __init__(self, season='None', team='None', aliases=[]):
         """
         Initialize TeamSeason object
         """
         self.season = season
         self.team   = team
-        self.games  = []
+        self.codes  = set([team] + list(aliases))
+        
+        # key = (location, result), value = _Partition
+        self._partitions = {}
+        for location in LOCATIONS:
+            for result in RESULTS:
+                self._partitions[(location, result)] = _Partition()
+        
+        # key = date string, value = Game
+        self._by_date = {}
+        
+        # all games, in date order
+        self.games = self._partitions[('all', 'all')].games
     
     
     def __repr__(self):
@@ -41,11 +195,96 @@ class TeamSeason():
         return s
     
     
+    def code(self, g):
+        """
+        return: string | team's code in Game (team or an alias)
+        """
+        return g.home if g.home in self.codes else g.away
+    
+    
+    def side(self, g):
+        """
+        return: string | 'home' or 'away' for team in Game
+        """
+        return 'home' if g.home in self.codes else 'away'
+    
+    
+    def outcome(self, g):
+        """
+        return: int | +1 if team won Game, -1 if it lost, 0 otherwise
+        """
+        code = self.code(g)
+        
+        if   code == g.winner(): return 1
+        elif code == g.loser():  return -1
+        else:                    return 0
+    
+    
+    def _partition_keys(self, g):
+        """
+        return: list[tuple] | (location, result) partitions game belongs to
+        """
+        locations = ['all', self.side(g)]
+        
+        results = ['all']
+        outcome = self.outcome(g)
+        if   outcome > 0: results.append('wins')
+        elif outcome < 0: results.append('losses')
+        
+        if g.ended_in_regulation():
+            results.append('R')
+        else:
+            results.append('notR')
+            results.append('OT' if g.ended_in_OT() else 'SO')
+        
+        return [(l, r) for l in locations for r in results]
+    
+    
     def insert(self, g):
         """
         insert game into season object
         """
-        self.games.append(g)
+        goals_for     = g.goals_for(self.code(g))
+        goals_against = g.goals_against(self.code(g))
+        
+        for key in self._partition_keys(g):
+            self._partitions[key].insert(g, goals_for, goals_against)
+        
+        self._by_date[g.date] = g
+    
+    
+    def get_state(self):
+        """
+        return: dict[tuple:tuple] | (location, result) ---> (games,
+                                    goals_for, goals_against) of each
+                                    partition (copies, in date order)
+        """
+        state = {}
+        for key, partition in self._partitions.items():
+            state[key] = (list(partition.games), list(partition.goals_for), list(partition.goals_against))
+        
+        return state
+    
+    
+    def set_state(self, state):
+        """
+        Rebuild every partition from get_state() output, e.g.
+        read back from a cache, instead of inserting each game
+        
+        params:
+            state: dict[tuple:tuple] | (location, result) ---> (games, goals_for,
+                                       goals_against) plus, optionally, the
+                                       prefix sums and ordinals (see
+                                       _Partition.restore); the lists are
+                                       kept, not copied
+        """
+        for key, partition in self._partitions.items():
+            partition.restore(*state[key])
+        
+        # all games, in date order
+        self.games = self._partitions[('all', 'all')].games
+        
+        self._by_date = dict((g.date, g) for g in self.games)
     
     
     def game_on_date(self, date):
@@ -54,17 +293,53 @@ class TeamSeason():
         params:
             date: string | a date string e.g. '2010-10-31'
         """
-        g = [x for x in self.games if x.date == date]
-        
-        if g:
-            return g[0]
-        else:
+        try:
+            return self._by_date[date]
+        except KeyError:
             raise IndexError('no Game found on '+date)
     
     
+    def _select(self, location='all', result='all', before=None, after=None):
+        """
+        return: _Partition, int, int | partition for location and result
+                                       and the [lo:hi) range of games
+                                       strictly between after and before
+                                       (indices only, nothing is copied)
+        params:
+          location: string | 'all', 'home', or 'away'
+            result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+            before: string | cut-off date (or date ordinal)
+             after: string | cut-off date (or date ordinal)
+        """
+        # location can only be 'all', 'home' or 'away'
+        assert location in LOCATIONS, 'location='+str(location)
+        
+        # result can only be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+        assert result in RESULTS, 'result='+str(result)
+        
+        partition = self._partitions[(location, result)]
+        
+        lo, hi = 0, len(partition.games)
+        
+        # first game strictly after the after date
+        if after:
+            if not isinstance(after, int): after = date_ordinal(after)
+            lo = bisect_right(partition.ordinals, after)
+        
+        # first game on or after the before date
+        if before:
+            if not isinstance(before, int): before = date_ordinal(before)
+            hi = bisect_left(partition.ordinals, before)
+        
+        return partition, lo, max(lo, hi)
+    
+    
     def get_games(self, location='all', result='all', before=None, after=None):
         """
         return: list[Game] | list of games for team in TeamSeason
+                             (a new list: a copy of the slice of the
+                             precomputed partition, O(games returned);
+                             the Game objects themselves are shared)
         
         params:
           location: string | 'all', 'home', or 'away'
@@ -74,108 +349,9 @@ class TeamSeason():
              after: string | cut-off date to consider games after
                              (e.g. '2010-10-31')
         """
-        # location can only be 'all', 'home' or 'away'
-        assert location in ['all', 'home', 'away'], 'location='+str(location)
-        
-        # result can only be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
-        assert result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO'], 'result='+str(result)
+        partition, lo, hi = self._select(location=location, result=result, before=before, after=after)
         
-        # consider both home and away games
-        if location == 'all':
-            
-            # consider all games between two dates
-            if before and after:
-                selection = [g for g in self.games if before < g.date < after]
-            
-            # consider all games before given date
-            elif before:
-                selection = [g for g in self.games if g.date < before]
-                
-            # consider all games after given date
-            elif after:
-                selection = [g for g in self.games if g.date > after]
-                
-            # consider all games
-            else:
-                selection = self.games
-        
-        # consider only home games
-        elif location == 'home':
-            
-            # select all home games
-            home_games = [g for g in self.games if self.team == g.home]
-            
-            # consider home games between two dates
-            if before and after:
-                selection = [g for g in home_games if before < g.date < after]
-             
-            # consider only home games before given date
-            elif before:
-                selection = [g for g in home_games if g.date < before]
-            
-            # consider only home games after given date
-            elif after:
-                selection = [g for g in home_games if g.date > after]
-                
-            # consider all home games
-            else:
-                selection = home_games
-                
-        # consider only away games
-        elif location == 'away':
-            
-            # select all away games
-            away_games = [g for g in self.games if self.team == g.away]
-            
-            # consider away games between two dates
-            if before and after:
-                selection = [g for g in away_games if before < g.date < after]
-            
-            # consider only away games before given date
-            if before:
-                selection = [g for g in away_games if g.date < before]
-            
-            # consider only away games after given date
-            if after:
-                selection = [g for g in away_games if g.date > after]
-                
-            # consider all away games
-            else: 
-                selection = away_games
-        
-        #====================================#
-        # now have "selection" of games      #
-        # partitioned by dates and locations #
-        #====================================#
-        
-        # return all results from selection
-        if result == 'all':
-            return selection
-                        
-        # consider only wins from selection
-        elif result == 'wins':
-            return [g for g in selection if self.team == g.winner()]
-        
-        # consider only losses from selection
-        elif result == 'losses':
-            return [g for g in selection if self.team == g.loser()]
-        
-        # consider only games that ended in regulation from selection
-        elif result == 'R':
-            return [g for g in selection if g.ended_in_regulation()]
-        
-        # consider only games that ended not in regulation from selection
-        # i.e. all OT and SO games
-        elif result == 'notR':
-            return [g for g in selection if not g.ended_in_regulation()]
-        
-        # consider only games that ended in OT from selection
-        elif result == 'OT':
-            return [g for g in selection if g.ended_in_OT()]
-            
-        # consider only games that ended in SO from selection
-        elif result == 'SO':
-            return [g for g in selection if g.ended_in_SO()]
+        return partition.games[lo:hi]
     
     
     def num_games(self, location='all', result='all', before=None, after=None):
@@ -190,13 +366,9 @@ class TeamSeason():
              after: string | cut-off date to consider games before
                              (e.g. '2010-10-31')
         """
-        # location can only be 'all', 'home' or 'away'
-        assert location in ['all', 'home', 'away'], 'location='+str(location)
-        
-        # retrieve appropriate selection of games
-        selection = self.get_games(location=location, result=result, before=before, after=after)
+        partition, lo, hi = self._select(location=location, result=result, before=before, after=after)
         
-        return len( selection )
+        return hi - lo
     
     
     def get_goals_lists(self, N, location='all', result='all', before=None):
@@ -206,6 +378,7 @@ class TeamSeason():
         
         return: goals_for_list, goals_against_list | list[int], list[int]
                 ---> total goals for/against for date and result selection
+                     (copies of the partition's last N entries)
         params:
                  N: int    | number of previous games to consider for total
                              if N > current games in season, return -1
@@ -213,26 +386,155 @@ class TeamSeason():
             result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
             before: string | date string e.g. '2010-01-31'
         """
-        # location can only be 'all', 'home' or 'away'
-        assert location in ['all', 'home', 'away'], 'location='+str(location)
-        
-        # result can only be 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
-        assert result in ['all', 'wins', 'losses', 'R', 'notR', 'OT', 'SO'], 'result='+str(result)
-        
-        # get all games with given location and result before given date
-        games = self.get_games(location=location, result=result, before=before)
-        
-        # get goals for and goals against lists
-        goals_for_list     = [g.goals_for(self.team)     for g in games]
-        goals_against_list = [g.goals_against(self.team) for g in games]
+        # all games with given location and result before given date
+        partition, lo, hi = self._select(location=location, result=result, before=before)
         
         # check to see if enough data for N
-        if len(goals_for_list) < N:
+        if hi - lo < N:
             # if not, return empty lists
             return [], []
         
         # otherwise there are enough games
         else:
             # return the previous N games
-            return goals_for_list[-N:], goals_against_list[-N:]
+            return partition.goals_for[hi-N:hi], partition.goals_against[hi-N:hi]
     
+    
+    def get_goals_window(self, N, location='all', result='all', before=None, scheme='constant', halflife=None):
+        """
+        Weighted goals for/against over the previous N games,
+        computed in O(1) from the partition prefix sums for
+        'constant' and 'linear' weights, in O(N) for 'exponential'
+        weights (same weights as utils.get_weights), and in O(1)
+        from the running EWMA state over all previous games for
+        'ewma' (N is then the minimum number of games)
+        
+        return: goals_for, goals_against | float, float
+                ---> None if fewer than N games are available
+        params:
+                 N: int    | number of previous games in the window (>= 1)
+          location: string | 'all', 'home', or 'away' (default='all')
+            result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+            before: string | date string e.g. '2010-01-31' (or date ordinal)
+            scheme: string | 'constant', 'linear', 'exponential' or 'ewma'
+                             (default='constant')
+          halflife: float  | games for a weight to halve ('exponential'
+                             and 'ewma' only)
+        """
+        # scheme must be 'constant', 'linear', 'exponential' or 'ewma'
+        assert scheme in SCHEMES, 'scheme='+str(scheme)
+        
+        # an empty window has no average
+        assert N >= 1, 'window size must be >= 1; given N='+str(N)
+        
+        partition, lo, hi = self._select(location=location, result=result, before=before)
+        
+        # check to see if enough data for N
+        if hi - lo < N:
+            return None
+        
+        # running EWMA state after the previous hi games
+        if scheme == 'ewma':
+            ewma_for, ewma_against = partition.ewma_series(get_decay(halflife))
+            return ewma_for[hi], ewma_against[hi]
+        
+        # explicit weights over the window
+        if scheme == 'exponential':
+            weights = get_weights(N, scheme=scheme, halflife=halflife)
+            return (sum(w*x for w, x in zip(weights, partition.goals_for[hi-N:hi])),
+                    sum(w*x for w, x in zip(weights, partition.goals_against[hi-N:hi])))
+        
+        cum_for, cum_against = partition.cum_for, partition.cum_against
+        
+        # plain sums over games [hi-N, hi)
+        sum_for     = cum_for[hi]     - cum_for[hi-N]
+        sum_against = cum_against[hi] - cum_against[hi-N]
+        
+        if scheme == 'constant':
+            return sum_for / float(N), sum_against / float(N)
+        
+        # linear weights k/(N(N+1)/2) for k = i-(hi-N)+1, i.e.
+        # sum(k*x_i) = sum(i*x_i) - (hi-N-1)*sum(x_i)
+        elif scheme == 'linear':
+            icum_for, icum_against = partition.icum_for, partition.icum_against
+            norm  = N*(N+1) / 2.0
+            shift = hi - N - 1
+            return ((icum_for[hi]     - icum_for[hi-N]     - shift*sum_for)     / norm,
+                    (icum_against[hi] - icum_against[hi-N] - shift*sum_against) / norm)
+    
+    
+    def get_goals_series(self, location='all', result='all'):
+        """
+        return: ordinals, goals_for, goals_against | list[int]*3
+                ---> whole partition for location and result in date
+                     order (the stored lists: do not modify)
+        params:
+          location: string | 'all', 'home', or 'away' (default='all')
+            result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+        """
+        partition, lo, hi = self._select(location=location, result=result)
+        
+        return partition.ordinals, partition.goals_for, partition.goals_against
+    
+    
+    def get_goals_ewma(self, halflife, location='all', result='all'):
+        """
+        return: ordinals, ewma_for, ewma_against | list[int], list[float]*2
+                ---> partition for location and result in date order
+                     with the EWMA state after j games at index j
+                     (the stored lists: do not modify)
+        params:
+          halflife: float  | games for a weight to halve
+          location: string | 'all', 'home', or 'away' (default='all')
+            result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+        """
+        partition, lo, hi = self._select(location=location, result=result)
+        
+        ewma_for, ewma_against = partition.ewma_series(get_decay(halflife))
+        
+        return partition.ordinals, ewma_for, ewma_against
+    
+    
+    def current_streak(self, before=None, location='all', result='all', kind=None):
+        """
+        Streak coming into a game on the before date, found by walking
+        back from the last selected game (O(streak length)); matches
+        the streaks Season.get_streaks() inserts
+        
+        return: int | streak (pos=winning, neg=losing)
+        params:
+            before: string | date string e.g. '2010-01-31' (or date ordinal)
+                             (default=None, after the last game)
+          location: string | 'all', 'home', or 'away' (default='all')
+            result: string | 'all', 'wins', 'losses', 'R', 'notR', 'OT', or 'SO'
+              kind: string | None (wins/losses, the first selected game
+                             never counts), 'point', 'reg' or 'venue'
+                             (wins/losses over the partition, pass the
+                             venue as location)
+        """
+        # kind must be None, 'point', 'reg' or 'venue'
+        assert kind in [None, 'point', 'reg', 'venue'], 'kind='+str(kind)
+        
+        partition, lo, hi = self._select(location=location, result=result, before=before)
+        
+        # the first selected game never counts towards the win/loss streak
+        first = 1 if kind is None else 0
+        
+        streak = 0
+        for g in reversed(partition.games[first:hi]):
+            
+            # +1 win, -1 loss, 0 neither
+            outcome = self.outcome(g)
+            
+            if kind == 'point':
+                outcome = -1 if g.ended_in_regulation() and outcome < 0 else 1
+            elif kind == 'reg' and not g.ended_in_regulation():
+                outcome = 0
+            
+            # stop at the first game breaking the streak
+            if outcome == 0 or streak*outcome < 0:
+                break
+            
+            streak += outcome
+        
+        return streak
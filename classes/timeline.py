@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+"""
+timeline.py
+Author: Brian Boates
+
+Multi-season Timeline object for hockey
+analysis and prediction package
+
+A Timeline holds the games of several seasons
+in one canonical store with one TeamSeason per
+franchise spanning all of them, so windows,
+EWMAs and streaks can run across season
+boundaries (the first games of a season are
+projected from the end of the previous one)
+"""
+import bisect
+import hashlib
+import projections
+from game import date_ordinal
+from season import Season
+from team_season import TeamSeason
+
+# key = old team code, value = franchise's current code
+FRANCHISES = {'ATL': 'WPG'}
+
+# how windows, EWMAs and streaks treat a new season
+BOUNDARIES = ['carry', 'reset']
+
+class Timeline(Season):
+    """
+    Timeline object (a Season spanning several seasons)
+    fields:
+         boundary: string ('carry' or 'reset')
+       franchises: dict[string:string]
+          seasons: list[Season]
+    methods:
+        add_season(season)
+        insert_game(g)
+        seasons()
+        team_key(team)
+        get_projections(N, location, result, scheme, engine, suffix, halflife, cache, boundary)
+        get_projection_grid(grid, engine, boundary)
+        get_streaks(location, result, variants, cache, boundary)
+        matchup_features(away, home, date, window, location, result, scheme, halflife, variants, suffix, boundary)
+        ingest_result(record, window, location, result, scheme, halflife, variants, suffix, boundary)
+    """
+    def __init__(self, seasons=[], boundary='carry', franchises=FRANCHISES):
+        """
+        Initialize Timeline object
+        params:
+             seasons: list[Season]        | chronological seasons built
+                                            with Season.add_game()
+            boundary: string              | 'carry' (windows, EWMAs and
+                                            streaks continue across
+                                            seasons) or 'reset' (each
+                                            season on its own)
+          franchises: dict[string:string] | old team code ---> franchise code
+        """
+        # boundary must be 'carry' or 'reset'
+        assert boundary in BOUNDARIES, 'boundary='+str(boundary)
+
+        Season.__init__(self, 'None')
+
+        self.boundary   = boundary
+        self.franchises = dict(franchises)
+        self._seasons   = []
+        self._starts    = []
+
+        for season in seasons:
+            self.add_season(season)
+
+
+    def add_season(self, season):
+        """
+        Append a season's games (shared, not copied) to the
+        Timeline; seasons should be added in date order
+
+        params:
+            season: Season | season built with Season.add_game()
+        """
+        # needs the canonical game store
+        assert season.games() or not season.teams(), 'season='+str(season.season)+' has no game store'
+
+        # the season already holds its games
+        for g in season.games():
+            Season.insert_game(self, g)
+
+        # first date ordinal of each season, for _season_on()
+        start = min(g.ordinal for g in season.games()) if season.games() else 0
+        if self._starts:
+            start = max(start, self._starts[-1])
+
+        self._seasons.append(season)
+        self._starts.append(start)
+
+        # e.g. '2005_2006-2011_2012'
+        self.season = self._seasons[0].season+'-'+self._seasons[-1].season
+        
+        # known only if every season's source data is
+        checksums = [s.checksum for s in self._seasons]
+        self.checksum = None
+        if all(checksums):
+            self.checksum = hashlib.sha1(' '.join(checksums)).hexdigest()
+
+
+    def insert_game(self, g):
+        """
+        Store a new Game in the Timeline and in the season it
+        belongs to (see _season_on), so both boundaries see it
+
+        params:
+            g: Game | game to store
+        """
+        Season.insert_game(self, g)
+
+        season = self._season_on(g.ordinal)
+        if season is not None:
+            season.insert_game(g)
+
+
+    def _season_on(self, date):
+        """
+        return: Season | season in play on date: the last one started
+                         on or before it (the first one for earlier
+                         dates), None for an empty Timeline
+        params:
+            date: string | date string e.g. '2012-03-01' (or date ordinal)
+        """
+        if not self._seasons:
+            return None
+
+        if not isinstance(date, int):
+            date = date_ordinal(date)
+
+        i = bisect.bisect_right(self._starts, date) - 1
+
+        return self._seasons[max(i, 0)]
+
+
+    def _season_team(self, season, team):
+        """
+        return: TeamSeason | team's state in a member season (e.g.
+                             'WPG' as 'ATL' in 2010_2011); a throwaway
+                             empty TeamSeason (the season is left
+                             unchanged) for a team yet to play in it
+        """
+        # teams unknown to the Timeline fail as in Season
+        key = self.get_team_season(team).team
+
+        for code in season.teams():
+            if self.team_key(code) == key:
+                return season.get_team_season(code)
+
+        return season._new_team_season(key)
+
+
+    def seasons(self):
+        """
+        return: list[Season] | seasons in the Timeline, in order
+        """
+        return self._seasons
+
+
+    def team_key(self, team):
+        """
+        return: string | franchise code for a team code
+                         (e.g. 'ATL' ---> 'WPG')
+        """
+        return self.franchises.get(team, team)
+
+
+    def _new_team_season(self, team):
+        """
+        return: TeamSeason | empty TeamSeason for a franchise,
+                             accepting all of its team codes
+        """
+        aliases = [code for code in self.franchises if self.franchises[code] == team]
+
+        return TeamSeason(season=self.season, team=team, aliases=aliases)
+
+
+    def _reset(self, boundary):
+        """
+        return: bool | True if seasons are handled one at a time
+        params:
+            boundary: string | 'carry', 'reset' or None (Timeline default)
+        """
+        if boundary is None:
+            boundary = self.boundary
+
+        # boundary must be 'carry' or 'reset'
+        assert boundary in BOUNDARIES, 'boundary='+str(boundary)
+
+        return boundary == 'reset'
+
+
+    def get_projections(self, window, location='all', result='all', scheme='constant', engine='python', suffix='', halflife=None, cache=None, boundary=None):
+        """
+        Season.get_projections() over the whole Timeline
+        params:
+            (see Season.get_projections)
+          boundary: string | 'carry' or 'reset' (default=Timeline.boundary)
+        """
+        if self._reset(boundary):
+            for season in self._seasons:
+                season.get_projections(window, location=location, result=result, scheme=scheme,
+                                       engine=engine, suffix=suffix, halflife=halflife, cache=cache)
+        else:
+            Season.get_projections(self, window, location=location, result=result, scheme=scheme,
+                                   engine=engine, suffix=suffix, halflife=halflife, cache=cache)
+
+
+    def get_projection_grid(self, grid, engine='numpy', boundary=None):
+        """
+        Season.get_projection_grid() over the whole Timeline
+        return: list[string] | feature name suffix for each setting
+        params:
+            (see Season.get_projection_grid)
+          boundary: string | 'carry' or 'reset' (default=Timeline.boundary)
+        """
+        if not self._reset(boundary):
+            return Season.get_projection_grid(self, grid, engine=engine)
+
+        grid = [tuple(setting) for setting in grid]
+
+        for season in self._seasons:
+            season.get_projection_grid(grid, engine=engine)
+
+        return [projections.projection_suffix(*setting) for setting in grid]
+
+
+    def get_streaks(self, location='all', result='all', variants=False, cache=None, boundary=None):
+        """
+        Season.get_streaks() over the whole Timeline
+        params:
+            (see Season.get_streaks)
+          boundary: string | 'carry' or 'reset' (default=Timeline.boundary)
+        """
+        if self._reset(boundary):
+            for season in self._seasons:
+                season.get_streaks(location=location, result=result, variants=variants, cache=cache)
+        else:
+            Season.get_streaks(self, location=location, result=result, variants=variants, cache=cache)
+
+
+    def matchup_features(self, away, home, date, window=10, location='all', result='all', scheme='constant', halflife=None, variants=False, suffix='', boundary=None):
+        """
+        Season.matchup_features() from the Timeline's state ('carry')
+        or from the state of the season in play on date ('reset')
+        params:
+            (see Season.matchup_features)
+          boundary: string | 'carry' or 'reset' (default=Timeline.boundary)
+        """
+        params = dict(window=window, location=location, result=result, scheme=scheme,
+                      halflife=halflife, variants=variants, suffix=suffix)
+
+        season = self._season_on(date)
+
+        if season is None or not self._reset(boundary):
+            return Season.matchup_features(self, away, home, date, **params)
+
+        return season._matchup_features(self._season_team(season, away), self._season_team(season, home), date, **params)
+
+
+    def ingest_result(self, record, window=10, location='all', result='all', scheme='constant', halflife=None, variants=False, suffix='', boundary=None):
+        """
+        Season.ingest_result() over the whole Timeline; the new game
+        is stored in both the Timeline and its season (see insert_game)
+        params:
+            (see Season.ingest_result)
+          boundary: string | 'carry' or 'reset' for the returned features
+                             (default=Timeline.boundary)
+        """
+        params = dict(window=window, location=location, result=result, scheme=scheme,
+                      halflife=halflife, variants=variants, suffix=suffix, boundary=boundary)
+
+        return self._ingest(record, params)
@@ -10,19 +10,78 @@ table with its respective score data
 
 Also includes methods to get team
 and season data.
+
+Two storage backends are supported:
+    'mysql':  MySQL server on localhost (default)
+    'sqlite': embedded SQLite file (e.g. hockey.sqlite)
 """
+import os
 import glob
-import MySQLdb as mdb
+import time
+import sqlite3
+try:
+    import MySQLdb as mdb
+except ImportError:
+    mdb = None
 from classes.game import Game
 from classes.team_season import TeamSeason
 from classes.season import Season
+from loader import parseLine
+
+BACKENDS = ['mysql', 'sqlite']
 
-def dbRemove(db='hockey'):
+def dbConnect(db='hockey', backend='mysql'):
+    """
+    return: connection to the hockey database
+    params:
+            db: string | the name of the database
+       backend: string | 'mysql' or 'sqlite' (default='mysql')
+    """
+    # backend can only be 'mysql' or 'sqlite'
+    assert backend in BACKENDS, 'backend='+str(backend)
+    
+    if backend == 'mysql':
+        return mdb.connect(host='localhost', db=db, user='root')
+    
+    elif backend == 'sqlite':
+        return sqlite3.connect(db+'.sqlite')
+
+
+def isSQLite(cur):
+    """
+    return: bool | whether cursor belongs to the sqlite backend
+    params:
+        cur: cursor to the hockey database
+    """
+    return isinstance(cur, sqlite3.Cursor)
+
+
+def quoteTable(table):
+    """
+    return: string | table name quoted for both backends
+                     (season names start with a digit)
+    params:
+        table: string | the name of the database table
+    """
+    return '`'+table+'`'
+
+
+def dbRemove(db='hockey', backend='mysql'):
     """
     WARNING! This function will drop current hockey database
     params:
-            db: string | the name of the MySQL database
+            db: string | the name of the database
+       backend: string | 'mysql' or 'sqlite' (default='mysql')
     """
+    # backend can only be 'mysql' or 'sqlite'
+    assert backend in BACKENDS, 'backend='+str(backend)
+    
+    # the sqlite database is a single file
+    if backend == 'sqlite':
+        if os.path.exists(db+'.sqlite'):
+            os.remove(db+'.sqlite')
+        return
+    
     # connect to MySQL and create cursor
     con = mdb.connect(host='localhost', user='root')
     cur = con.cursor()
@@ -40,21 +99,41 @@ def dbRemove(db='hockey'):
     if con: con.close()
 
 
-def dbCreate(db='hockey'):
+def dbCreate(db='hockey', bulk=False, chunk_size=500, backend='mysql'):
     """
-    Create the MySQL hockey database
+    Create the hockey database
     params:
-            db: string | the name of the MySQL database
+            db: string | the name of the database
+          bulk: bool   | use batched dbPopulateBulk() or not
+    chunk_size: int    | rows per multi-row INSERT when bulk=True
+       backend: string | 'mysql' or 'sqlite' (default='mysql')
     """
-    # connect to MySQL and create cursor
-    con = mdb.connect(host='localhost', user='root')
-    cur = con.cursor()
+    # backend can only be 'mysql' or 'sqlite'
+    assert backend in BACKENDS, 'backend='+str(backend)
     
-    # create the hockey database if not already present
-    cur.execute("CREATE SCHEMA IF NOT EXISTS "+db)
+    if backend == 'mysql':
+        
+        # connect to MySQL and create cursor
+        con = mdb.connect(host='localhost', user='root')
+        cur = con.cursor()
+        
+        # create the hockey database if not already present
+        cur.execute("CREATE SCHEMA IF NOT EXISTS "+db)
+        
+        # change to newly created hockey database
+        cur.execute("USE "+db)
+        
+        # auto-incrementing primary key
+        key = "id INT PRIMARY KEY AUTO_INCREMENT"
     
-    # change to newly created hockey database
-    cur.execute("USE "+db)
+    elif backend == 'sqlite':
+        
+        # connecting creates the database file
+        con = dbConnect(db=db, backend=backend)
+        cur = con.cursor()
+        
+        # auto-incrementing primary key
+        key = "id INTEGER PRIMARY KEY AUTOINCREMENT"
     
     # with connection to the hockey database
     with con:
@@ -69,14 +148,17 @@ def dbCreate(db='hockey'):
         for season in seasons:
             
             # each table has a date, home and away teams/goals and a result
-            command  = "CREATE TABLE IF NOT EXISTS "+season+" (id INT PRIMARY KEY "
-            command += "AUTO_INCREMENT, date DATE, away CHAR(3), home CHAR(3), "
+            command  = "CREATE TABLE IF NOT EXISTS "+quoteTable(season)+" ("+key+", "
+            command += "date DATE, away CHAR(3), home CHAR(3), "
             command += "agoal INT, hgoal INT, result CHAR(2))"
             print command
             cur.execute(command)
             
             # populate the current season table
-            dbPopulate(cur=cur, table=season)
+            if bulk:
+                dbPopulateBulk(cur=cur, table=season, chunk_size=chunk_size)
+            else:
+                dbPopulate(cur=cur, table=season)
                                 
     # close cursor and connection
     if cur: cur.close()
@@ -91,7 +173,7 @@ def dbPopulate(cur, table):
         table: string | the name of the database table
     """
     # create root string for MySQL insertions
-    root = "INSERT INTO "+table+"(date,away,home,agoal,hgoal,result) "
+    root = "INSERT INTO "+quoteTable(table)+"(date,away,home,agoal,hgoal,result) "
     
     # open the corresponding .scores file
     scoresFile = open('scores/'+table.replace('_','-')+'.scores', 'rU')
@@ -117,6 +199,88 @@ def dbPopulate(cur, table):
         cur.execute(command)
 
 
+def readScores(scoresFile, chunk_size=500):
+    """
+    Stream a .scores file in chunks of parsed rows
+
+    yield: list[tuple] | up to chunk_size rows of
+                         (date, away, home, agoal, hgoal, result)
+    params:
+        scoresFile: file | open .scores file
+        chunk_size: int  | maximum number of rows per chunk
+    """
+    chunk = []
+    
+    for line in scoresFile:
+        
+        # skip blank lines
+        record = parseLine(line)
+        if not record:
+            continue
+        
+        chunk.append(record)
+        
+        # hand off a full chunk
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    
+    # hand off the remainder
+    if chunk:
+        yield chunk
+
+
+def dbPopulateBulk(cur, table, chunk_size=500):
+    """
+    Populate the MySQL hockey database for a given season
+    using parameterized multi-row INSERTs
+    (sqlite uses executemany() per chunk instead)
+    
+    return: int | number of rows inserted
+    params:
+          cur: cursor to the MySQL hockey database
+        table: string | the name of the database table
+   chunk_size: int    | number of rows per INSERT statement
+    """
+    # placeholders for a single row
+    if isSQLite(cur):
+        row = "(?,?,?,?,?,?)"
+    else:
+        row = "(%s,%s,%s,%s,%s,%s)"
+    
+    # root string for insertions
+    root = "INSERT INTO "+quoteTable(table)+"(date,away,home,agoal,hgoal,result) VALUES "
+    
+    t0 = time.time()
+    count = 0
+    
+    # open the corresponding .scores file
+    scoresFile = open('scores/'+table.replace('_','-')+'.scores', 'rU')
+    
+    # one INSERT per chunk of rows
+    for chunk in readScores(scoresFile, chunk_size=chunk_size):
+        
+        # sqlite caps the number of parameters per statement
+        if isSQLite(cur):
+            cur.executemany(root + row, chunk)
+        
+        else:
+            # flatten the chunk into a single parameter list
+            params = [value for record in chunk for value in record]
+            cur.execute(root + ",".join([row]*len(chunk)), params)
+        
+        count += len(chunk)
+    
+    scoresFile.close()
+    
+    # report throughput
+    elapsed = time.time() - t0
+    rate = count / elapsed if elapsed > 0 else float('inf')
+    print table+': '+str(count)+' rows in '+'%.3f' % elapsed+' s ('+'%.0f' % rate+' rows/s)'
+    
+    return count
+
+
 def getSeasonNames(cur):
     """
     return: list[string] | list of all available seasons
@@ -124,11 +288,14 @@ def getSeasonNames(cur):
         cur: cursor to the MySQL hockey database
     """
     # seasons are the table names
-    cur.execute('SHOW TABLES')
+    if isSQLite(cur):
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+    else:
+        cur.execute('SHOW TABLES')
     fetch = cur.fetchall()
     
-    # loop through and append seasons
-    seasonNames = [s[0] for s in fetch if s[0] != '1900_1901']
+    # loop through and append seasons (skip sqlite's internal tables)
+    seasonNames = [s[0] for s in fetch if s[0] != '1900_1901' and not s[0].startswith('sqlite_')]
     
     return seasonNames
 
@@ -141,7 +308,7 @@ def getTeams(cur, table):
         table: string | the name of the database table
     """
     # grab alphabetized list of distinct home teams (all teams once)
-    cur.execute('SELECT DISTINCT(home) FROM '+table+' ORDER BY home')
+    cur.execute('SELECT DISTINCT(home) FROM '+quoteTable(table)+' ORDER BY home')
     fetch = cur.fetchall()
     
     # loop through and append to teams list
@@ -164,16 +331,19 @@ def getTeamSeason(cur, team, table, loc='all'):
     # loc can only be 'all', 'home' or 'away'
     assert loc in ['all', 'home', 'away'], 'loc='+str(loc)
     
+    # parameter placeholder for the backend
+    p = '?' if isSQLite(cur) else '%s'
+    
     # home, away, or all games from season for team
     if loc == 'all':
-        where = 'WHERE away = \"'+team+'\" OR home = \"'+team+'\"'
+        where, params = 'WHERE away = '+p+' OR home = '+p, (team, team)
     elif loc == 'home':
-        where = 'WHERE home = \"'+team+'\"'
+        where, params = 'WHERE home = '+p, (team,)
     elif loc == 'away':
-        where = 'WHERE away = \"'+team+'\"'
+        where, params = 'WHERE away = '+p, (team,)
     
     # select the season for team
-    cur.execute('SELECT * FROM '+table+' '+where)
+    cur.execute('SELECT * FROM '+quoteTable(table)+' '+where+' ORDER BY id', params)
     fetch = cur.fetchall()
     
     # create TeamSeason object    
@@ -193,6 +363,10 @@ def getTeamSeason(cur, team, table, loc='all'):
 
 def getSeason(cur, table):
     """
+    Load a full season with a single query and split
+    its games into each team's TeamSeason in memory
+    (one shared Game per game, see Season.add_game)
+    
     return: Season | each team's 82 game TeamSeason
                      for given table/season
     params:
@@ -202,27 +376,59 @@ def getSeason(cur, table):
     # initialize Season object dictionary
     allTeamSeasons = Season(table)
     
-    # get list of teams for given season
-    teams = getTeams(cur, table)
+    # select every game in the season once, in insertion order
+    cur.execute('SELECT date, away, home, agoal, hgoal, result FROM '+quoteTable(table)+' ORDER BY id')
+    fetch = cur.fetchall()
     
-    # get the TeamSeason for each team
-    for team in teams:
-        
-        # key = team, value = Season
-        allTeamSeasons.insert( getTeamSeason(cur, team, table) )
+    # each game is stored once and shared by both teams
+    for record in fetch:
+        allTeamSeasons.add_game(record)
     
     return allTeamSeasons
 
 
-def main():
+def compareBackends(db='hockey', backends=BACKENDS):
+    """
+    Time loading every season through each backend
+    (each backend's database must already be created)
+    
+    return: dict[string:float] | seconds taken per backend
+    params:
+            db: string       | the name of the database
+      backends: list[string] | backends to compare
+    """
+    timings = {}
+    
+    for backend in backends:
+        
+        t0 = time.time()
+        
+        # connect and load all available seasons
+        con = dbConnect(db=db, backend=backend)
+        cur = con.cursor()
+        for season_name in getSeasonNames(cur):
+            getSeason(cur, season_name)
+        if cur: cur.close()
+        if con: con.close()
+        
+        timings[backend] = time.time() - t0
+        print backend+': '+'%.3f' % timings[backend]+' s'
+    
+    return timings
+
+
+def main(backend='mysql'):
     """
     remove hockey database and create from scratch
     requires local scores/ directory with .scores files
+    params:
+       backend: string | 'mysql' or 'sqlite' (default='mysql')
     """
-    dbRemove(db='hockey')
-    dbCreate(db='hockey')
+    dbRemove(db='hockey', backend=backend)
+    dbCreate(db='hockey', bulk=True, backend=backend)
     pass
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    import sys
+    main(*sys.argv[1:2])
\ No newline at end of file
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+loader.py
+Author: Brian Boates
+
+Build Season objects directly from the
+YEAR-YEAR.scores files without a database
+
+Files are streamed line by line, so large
+concatenated history files (several seasons
+in one file), gzipped files (.gz) and
+memory-mapped reads are all supported
+"""
+import os
+import glob
+import gzip
+import mmap
+from classes.season import Season
+from classes.timeline import Timeline
+
+def openScores(path, use_mmap=False):
+    """
+    return: file, gzip file or mmap | the open .scores file (read its
+                                      lines with iterLines, close it
+                                      when done)
+    params:
+          path: string | path to .scores or .scores.gz file
+      use_mmap: bool   | memory-map the file or not
+                         (ignored for gzipped files)
+    """
+    # gzipped input is decompressed on the fly
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+
+    # mmap cannot map an empty file
+    if use_mmap and os.path.getsize(path) > 0:
+        f = open(path, 'rb')
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+
+    return open(path, 'rU')
+
+
+def iterLines(scores):
+    """
+    return: iterator over the lines of an openScores() file
+    """
+    # an mmap is not iterable by lines
+    if isinstance(scores, mmap.mmap):
+        return iter(scores.readline, '')
+
+    return scores
+
+
+def parseLine(line):
+    """
+    return: tuple | (date, away, home, agoal, hgoal, result)
+                    or None for a blank line
+    params:
+        line: string | line from a .scores file
+                       e.g. '2011-10-06 PHI 2 BOS 1 R'
+    """
+    row = line.split()
+
+    if not row:
+        return None
+
+    return (row[0], row[1], row[3], int(row[2]), int(row[4]), row[5])
+
+
+def iterRecords(path, use_mmap=False):
+    """
+    yield: tuple | (date, away, home, agoal, hgoal, result)
+                   for each game in the file
+    params:
+          path: string | path to .scores or .scores.gz file
+      use_mmap: bool   | memory-map the file or not
+    """
+    scores = openScores(path, use_mmap=use_mmap)
+
+    # closed even if the consumer stops early (on close() or
+    # garbage collection of the generator)
+    try:
+        for line in iterLines(scores):
+
+            record = parseLine(line)
+
+            if record:
+                yield record
+
+    finally:
+        scores.close()
+
+
+def seasonName(date):
+    """
+    return: string | season containing date (e.g. '2011_2012')
+                     seasons are taken to start in August
+    params:
+        date: string | date string e.g. '2011-10-06'
+    """
+    year, month = int(date[:4]), int(date[5:7])
+
+    if month >= 8:
+        return str(year)+'_'+str(year+1)
+    else:
+        return str(year-1)+'_'+str(year)
+
+
+def buildSeason(records, season_name):
+    """
+    return: Season | each team's TeamSeason built from records
+    params:
+          records: iterable[tuple] | (date, away, home, agoal, hgoal, result)
+      season_name: string          | season (e.g. '2005_2006')
+    """
+    season = Season(season_name)
+
+    # each game is stored once and shared by both teams
+    for record in records:
+        season.add_game(record)
+
+    return season
+
+
+def iterSeasons(path, use_mmap=False):
+    """
+    Stream a (possibly concatenated) chronological history
+    file, building one Season at a time
+
+    yield: Season | each season found in the file, in order
+    params:
+          path: string | path to .scores or .scores.gz file
+      use_mmap: bool   | memory-map the file or not
+    """
+    current, records = None, []
+
+    for record in iterRecords(path, use_mmap=use_mmap):
+
+        name = seasonName(record[0])
+
+        # a new season starts: hand off the finished one
+        if name != current:
+            if records:
+                yield buildSeason(records, current)
+            current, records = name, []
+
+        records.append(record)
+
+    if records:
+        yield buildSeason(records, current)
+
+
+def loadSeason(path, use_mmap=False):
+    """
+    return: Season | the season stored in a single .scores file
+                     named after the file (e.g. '2005_2006')
+    params:
+          path: string | path to .scores or .scores.gz file
+      use_mmap: bool   | memory-map the file or not
+    """
+    # e.g. 'scores/2005-2006.scores.gz' ---> '2005_2006'
+    name = os.path.basename(path).split('.')[0].replace('-','_')
+
+    return buildSeason(iterRecords(path, use_mmap=use_mmap), name)
+
+
+def getSeasonFiles(directory='scores'):
+    """
+    return: list[string] | sorted .scores(.gz) files in directory
+                           (skips the fake 1900-1901 test season)
+    params:
+        directory: string | directory holding .scores files
+    """
+    paths  = glob.glob(os.path.join(directory, '*.scores'))
+    paths += glob.glob(os.path.join(directory, '*.scores.gz'))
+
+    return sorted([p for p in paths if not os.path.basename(p).startswith('1900-1901')])
+
+
+def iterSeasonFiles(directory='scores', use_mmap=False):
+    """
+    yield: Season | each season in directory, in order
+    params:
+        directory: string | directory holding .scores files
+         use_mmap: bool   | memory-map the files or not
+    """
+    for path in getSeasonFiles(directory):
+        yield loadSeason(path, use_mmap=use_mmap)
+
+
+def loadTimeline(directory='scores', boundary='carry', use_mmap=False):
+    """
+    return: Timeline | every season in directory joined into one
+                       franchise-level history
+    params:
+        directory: string | directory holding .scores files
+         boundary: string | 'carry' or 'reset' (see Timeline)
+         use_mmap: bool   | memory-map the files or not
+    """
+    return Timeline(iterSeasonFiles(directory, use_mmap=use_mmap), boundary=boundary)
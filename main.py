@@ -5,87 +5,227 @@ Author: Brian Boates
 
 Main script for running hockey analysis
 """
-import MySQLdb as mdb
+import operator
+import itertools
+import multiprocessing
+import numpy as np
 from classes.game import Game
 from classes.team_season import TeamSeason
 from classes.season import Season
 from classes.features import Features
 from database import *
+from loader import loadSeason, getSeasonFiles
+from cache import loadSeasonCached, FeatureCache
+from classes.scaler import Scaler
 from utils import *
 
-def get_features(game_list, feature_names, scale=True):
+# name endings of the streak variants (see Season.get_streaks)
+VARIANT_STREAKS = ('_point_streak', '_reg_streak', '_venue_streak')
+
+def feature_matrix(game_list, feature_names, dtype=np.float64):
+    """
+    Bulk extraction of the features and target of many Games
+    straight into NumPy arrays (one C-level pass per array,
+    no per-feature Python loop)
+    
+    return: X, y | np.array[dtype] (games x features),
+                   np.array[int8] (numerical_result of each game)
+    params:
+          game_list: list[Game]   | list (or iterator) of Games
+      feature_names: list[string] | list of feature names
+              dtype: np.dtype     | dtype of X, e.g. np.float32
+                                    (default=np.float64)
+    """
+    games = list(game_list)
+    n, k  = len(games), len(feature_names)
+    
+    X = np.fromiter(itertools.chain.from_iterable(feature_rows(games, feature_names)), dtype=dtype, count=n*k).reshape(n, k)
+    
+    # set the target metric
+    y = np.fromiter(itertools.imap(operator.methodcaller('numerical_result'), games), dtype=np.int8, count=n)
+    
+    return X, y
+
+
+def feature_rows(games, feature_names):
+    """
+    return: iterator[tuple] | the requested feature values of each game
+    params:
+              games: list[Game]   | list of Games
+      feature_names: list[string] | list of feature names
+    """
+    # no features: an empty row per game
+    if not feature_names:
+        return (() for g in games)
+    
+    # tuple of the requested values from each game's features dict
+    getter = operator.itemgetter(*feature_names)
+    values = itertools.imap(getter, (g.features for g in games))
+    if len(feature_names) == 1:
+        values = ((v,) for v in values)
+    
+    return values
+
+
+def get_features(game_list, feature_names, scale=True, scaler=None, dtype=None):
     """
     return: features dataframe
     
     params:
-          game_list: list[Game]   | list of Games
+          game_list: list[Game]   | list (or iterator) of Games
       feature_names: list[string] | list of feature names
               scale: bool         | whether to feature scale or not
+             scaler: Scaler       | scaling statistics to reuse; an
+                                    unfitted one is fitted here and
+                                    can then be saved for serving
+              dtype: np.dtype     | dtype of the features (default=None:
+                                    np.float64 when scaled, otherwise each
+                                    column keeps its values' type, e.g.
+                                    int64 for streaks)
     """
-    # initialize features array
-    all_features = []
+    games = list(game_list)
     
-    # loop over all Games
-    for g in game_list:
-        
-        # create empty feature vector for current Game
-        game_features = []
-        
-        # loop over requested features
-        for f in feature_names:
-            
-            # append to game features
-            game_features.append( g.features[f] )
-        
-        # set the target metric
-        result = int( g.numerical_result() )
-        
-        # append the result as the final Game feature
-        game_features.append(result)
-        
-        # append the Game feature list to features array
-        all_features.append(game_features)
+    # unscaled, no dtype: pandas infers each column's dtype
+    if dtype is None and not scale:
+        features = pandas.DataFrame(list(feature_rows(games, feature_names)), columns=feature_names)
+        features['class'] = [int(g.numerical_result()) for g in games]
+        return features
     
-    # create features dataframe
-    features = pandas.DataFrame(all_features, columns=feature_names+['class'])
+    X, y = feature_matrix(games, feature_names, dtype=dtype or np.float64)
     
-    # feature scaling if requested
+    # feature scaling if requested (as utils.scale_features, in place)
     if scale:
-        features = scale_features(features, feature_names)
+        if scaler is None:
+            scaler = Scaler(span='full')
+        if not scaler.fitted():
+            scaler.fit(X, feature_names)
+        scaler.transform(X, feature_names, out=X)
+    
+    # create features dataframe, the result as the final column
+    features = pandas.DataFrame(X, columns=feature_names)
+    features['class'] = y.astype(int)
     
     return features
 
 
-def main():
+def featurize_season(season, feature_names, cache=None):
+    """
+    Compute projections and streaks for a Season
     
-    # connect to MySQL db and get cursor
-    con = mdb.connect(host='localhost', db='hockey', user='root')
-    cur = con.cursor()
+    return: iterator[Game] | chronological games with all features
+    params:
+             season: Season       | season to featurize
+      feature_names: list[string] | list of feature names
+              cache: FeatureCache | reuse features computed in earlier
+                                    runs on unchanged data (optional)
+    """
+    # compute projections for games in season, append to feature list
+    season.get_projections(window=10, location='all', result='all', scheme='constant', engine='numpy', cache=cache)
     
-    # get all available season names
-    season_names = getSeasonNames(cur)
+    # point/reg/venue streaks only when one of them is requested
+    variants = any(name.endswith(VARIANT_STREAKS) for name in feature_names)
     
-    # initialize list to hold all games from all seasons
-    game_list = []
-    feature_names = ['proj_diff_score', 'diff_streak']
+    # compute streaks for all teams' games, append to feature list
+    season.get_streaks(location='all', result='all', variants=variants, cache=cache)
     
-    # loop over all seasons
-    for season_name in season_names:
-        
-        # get Season for season_name
-        season = getSeason(cur, season_name)
-        
-        # compute projections for games in season, append to feature list
-        season.get_projections(window=10, location='all', result='all', scheme='constant')
+    # lazy chronological iterator over season's games
+    return season.iter_games(feature_names)
+
+
+def season_worker(task):
+    """
+    Load one season from its own source (a separate db connection
+    per call, so it is safe in a process pool) and featurize it
+    
+    return: list[Game] | chronological games with all features
+    params:
+        task: tuple | (source, backend, key, feature_names) where key
+                      is the season name for source='db' and the
+                      .scores file path otherwise
+    """
+    source, backend, key, feature_names = task
+    
+    cache = None
+    
+    if source == 'db':
+        con = dbConnect(db='hockey', backend=backend)
+        cur = con.cursor()
+        season = getSeason(cur, key)
+        if cur: cur.close()
+        if con: con.close()
+    
+    elif source == 'scores':
+        season = loadSeason(key)
+    
+    elif source == 'cache':
+        season = loadSeasonCached(key)
+        cache  = FeatureCache()
+    
+    return list( featurize_season(season, feature_names, cache=cache) )
+
+
+def main(source='db', backend='mysql', scores_dir='scores', workers=1):
+    """
+    params:
+        source: string | 'db' (hockey database), 'scores'
+                         (parse .scores files directly) or 'cache'
+                         (.scores files through the season cache,
+                         features through the feature cache)
+       backend: string | 'mysql' or 'sqlite' when source='db'
+    scores_dir: string | directory of .scores files when source='scores'
+       workers: int    | processes featurizing seasons in parallel
+                         (1 = serial, None = one per CPU)
+    """
+    # source can only be 'db', 'scores' or 'cache'
+    assert source in ['db', 'scores', 'cache'], 'source='+str(source)
+    
+    if source == 'db':
         
-        # compute streaks for all teams' games, append to feature list
-        season.get_streaks(location='all', result='all')
+        # connect to hockey db ('mysql' or 'sqlite') for the season names
+        con = dbConnect(db='hockey', backend=backend)
+        cur = con.cursor()
+        keys = getSeasonNames(cur)
+        if cur: cur.close()
+        if con: con.close()
+    
+    else:
         
-        # append all games from season to game_ist
-        game_list += season.all_games(feature_names)
+        # build each season straight from the .scores files
+        # ('cache' reuses built seasons while the files are unchanged)
+        keys = getSeasonFiles(scores_dir)
+    
+    feature_names = ['proj_diff_score', 'diff_streak']
+    
+    # one task per season; seasons never share state
+    tasks = [(source, backend, key, feature_names) for key in keys]
+    
+    game_lists = None
+    
+    # featurize seasons in parallel, results kept in season order
+    if workers != 1 and len(tasks) > 1:
+        try:
+            pool = multiprocessing.Pool(workers)
+        except OSError:
+            # e.g. no semaphore support: fall back to serial
+            pool = None
         
+        if pool is not None:
+            try:
+                game_lists = pool.map(season_worker, tasks)
+            except:
+                # a worker failed (or Ctrl-C): stop the others now
+                pool.terminate()
+                raise
+            finally:
+                pool.close()
+                pool.join()
+    
+    # serial: each season is loaded as its games are consumed
+    if game_lists is None:
+        game_lists = itertools.imap(season_worker, tasks)
+    
     # get features dataframe for all games
-    features = get_features(game_list, feature_names, scale=True)
+    features = get_features(itertools.chain.from_iterable(game_lists), feature_names, scale=True)
     
     print features.tail(100)
     
@@ -97,12 +237,6 @@ def main():
        
 #    makePlots(features[0], results, nbins=100)
     
-     
-        
-    # close cursor and connection to MySQL db
-    if cur: cur.close()
-    if con: con.close()    
-    
     
     
     
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+"""
+server.py
+Author: Brian Boates
+
+Local HTTP prediction server
+
+Seasons are loaded once into a multi-season
+Timeline whose per-team state (sorted goal
+partitions, prefix sums, EWMAs) answers each
+matchup query in memory, without the database:
+
+  GET  /predict?away=PHI&home=BOS&date=2012-03-01
+  POST /predict   [{"away": .., "home": .., "date": ..}, ...]
+                  (a bad entry gets {"error": ..} in its place)
+  GET  /stats     request count, p50/p99 latency, requests/s
+"""
+import sys
+import json
+import time
+import threading
+import collections
+import urlparse
+import BaseHTTPServer
+import SocketServer
+from classes.timeline import Timeline
+from database import dbConnect, getSeasonNames, getSeason
+from loader import loadSeason, getSeasonFiles
+from cache import loadSeasonCached
+
+# errors a malformed query can raise (answered with 400)
+BAD_QUERY = (KeyError, TypeError, ValueError, IndexError)
+
+class LatencyStats(object):
+    """
+    Thread-safe request counters with the latencies of
+    the most recent requests kept for percentiles
+    fields:
+         count: int
+         start: float (time.time() at creation)
+     latencies: deque[float] (seconds, most recent last)
+    methods:
+        record(seconds)
+        summary()
+    """
+    def __init__(self, maxlen=10000):
+        self.count     = 0
+        self.start     = time.time()
+        self.latencies = collections.deque(maxlen=maxlen)
+        self._lock     = threading.Lock()
+
+
+    def record(self, seconds):
+        """
+        Count one request that took seconds to answer
+        """
+        with self._lock:
+            self.count += 1
+            self.latencies.append(seconds)
+
+
+    def summary(self):
+        """
+        return: dict | requests, uptime, requests/s and p50/p99
+                       latency (ms) over the recent requests
+        """
+        with self._lock:
+            count, latencies = self.count, sorted(self.latencies)
+
+        uptime = time.time() - self.start
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return 1000.0 * latencies[min(len(latencies)-1, int(p*len(latencies)))]
+
+        return {'requests': count,
+                'uptime_s': uptime,
+                'rps':      count / uptime if uptime > 0 else 0.0,
+                'p50_ms':   percentile(0.50),
+                'p99_ms':   percentile(0.99)}
+
+
+def load_timeline(source='cache', backend='mysql', scores_dir='scores', boundary='carry'):
+    """
+    return: Timeline | every available season, loaded once
+    params:
+        source: string | 'db', 'scores' or 'cache' (see main.main)
+       backend: string | 'mysql' or 'sqlite' when source='db'
+    scores_dir: string | directory of .scores files
+      boundary: string | 'carry' or 'reset' (see Timeline)
+    """
+    # source can only be 'db', 'scores' or 'cache'
+    assert source in ['db', 'scores', 'cache'], 'source='+str(source)
+
+    timeline = Timeline(boundary=boundary)
+
+    if source == 'db':
+        con = dbConnect(db='hockey', backend=backend)
+        cur = con.cursor()
+        for season_name in getSeasonNames(cur):
+            timeline.add_season( getSeason(cur, season_name) )
+        if cur: cur.close()
+        if con: con.close()
+
+    else:
+        load = loadSeasonCached if source == 'cache' else loadSeason
+        for path in getSeasonFiles(scores_dir):
+            timeline.add_season( load(path) )
+
+    return timeline
+
+
+def predict(timeline, away, home, date, window=10):
+    """
+    return: dict | query, matchup features and predicted winner
+                   ('home' or 'away' from the sign of proj_diff_score,
+                   None without a full window for both teams)
+    params:
+      timeline: Timeline | loaded team state (features follow
+                           the Timeline's boundary)
+          away: string   | away team
+          home: string   | home team
+          date: string   | date string e.g. '2012-03-01'
+        window: int      | projection window size
+    """
+    features = timeline.matchup_features(away, home, date, window=window, variants=True)
+
+    prediction = None
+    diff = features.get('proj_diff_score')
+    if diff is not None and diff > 0:
+        prediction = 'home'
+    elif diff is not None and diff < 0:
+        prediction = 'away'
+
+    return {'away': away, 'home': home, 'date': date,
+            'features': features, 'prediction': prediction}
+
+
+class PredictionHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Request handler (the Timeline, window and LatencyStats
+    live on the server object)
+    """
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+
+        if url.path == '/stats':
+            self._reply(200, self.server.stats.summary())
+
+        elif url.path == '/predict':
+            query = dict((k, v[0]) for k, v in urlparse.parse_qs(url.query).items())
+            self._timed(lambda: self._predict(query))
+
+        else:
+            self._reply(404, {'error': 'unknown path '+url.path})
+
+
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+
+        if url.path != '/predict':
+            self._reply(404, {'error': 'unknown path '+url.path})
+            return
+
+        length = int(self.headers.getheader('content-length', 0))
+
+        try:
+            queries = json.loads(self.rfile.read(length))
+        except ValueError:
+            queries = None
+
+        if not isinstance(queries, list):
+            self._reply(400, {'error': 'body must be a JSON list of queries'})
+            return
+
+        self._timed(lambda: [self._predict_entry(query) for query in queries])
+
+
+    def _predict_entry(self, query):
+        """
+        return: dict | prediction for one query of a batch, or
+                       {'error': ..} if only this query is bad
+        """
+        try:
+            return self._predict(query)
+        except BAD_QUERY, e:
+            return {'error': 'bad query: '+repr(e)}
+
+
+    def _predict(self, query):
+        """
+        return: dict | prediction for one {away, home, date} query
+        """
+        return predict(self.server.timeline, str(query['away']), str(query['home']),
+                       str(query['date']), window=self.server.window)
+
+
+    def _timed(self, answer):
+        """
+        Reply with answer() and record its latency
+        """
+        t0 = time.time()
+
+        try:
+            status, body = 200, answer()
+        except BAD_QUERY, e:
+            status, body = 400, {'error': 'bad query: '+repr(e)}
+
+        self.server.stats.record(time.time() - t0)
+        self._reply(status, body)
+
+
+    def _reply(self, status, body):
+        data = json.dumps(body)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def log_message(self, format, *args):
+        # keep the request path quiet; see /stats instead
+        pass
+
+
+class PredictionServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Threaded HTTP server holding the loaded Timeline
+    """
+    daemon_threads = True
+
+    def __init__(self, address, timeline, window=10):
+        BaseHTTPServer.HTTPServer.__init__(self, address, PredictionHandler)
+        self.timeline = timeline
+        self.window   = window
+        self.stats    = LatencyStats()
+
+
+def main(host='127.0.0.1', port=8000, source='cache', backend='mysql', scores_dir='scores', window=10, boundary='carry'):
+    """
+    Load every season once and serve predictions until interrupted
+    params:
+          host: string | interface to listen on
+          port: int    | port to listen on
+        source: string | 'db', 'scores' or 'cache' (see load_timeline)
+       backend: string | 'mysql' or 'sqlite' when source='db'
+    scores_dir: string | directory of .scores files
+        window: int    | projection window size
+      boundary: string | 'carry' or 'reset' (see Timeline)
+    """
+    timeline = load_timeline(source=source, backend=backend, scores_dir=scores_dir, boundary=boundary)
+
+    server = PredictionServer((host, int(port)), timeline, window=int(window))
+
+    print 'serving '+timeline.season+' on http://'+host+':'+str(port)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -6,17 +6,33 @@ Author: Brian Boates
 Utility methods for hockey analysis
 """
 import pandas
+from classes.scaler import Scaler
 
-def get_weights(N, scheme='constant'):
+def get_decay(halflife):
+    """
+    return: float | EWMA smoothing factor alpha for a half-life,
+                    i.e. (1-alpha)**halflife = 0.5
+    params:
+        halflife: float | number of games for a weight to halve
+    """
+    assert halflife > 0, 'halflife must be > 0; given halflife='+str(halflife)
+    
+    return 1.0 - 0.5**(1.0/halflife)
+
+
+def get_weights(N, scheme='constant', halflife=None):
     """
     return: list[float] | list of weights, sum to 1
+                          (oldest game first)
     params:
             N: int    | length of weight array
        scheme: string | weighting scheme: default='constant'
-                        options are 'constant' or 'linear'
+                        options are 'constant', 'linear' or
+                        'exponential' (needs halflife)
+     halflife: float  | games for an exponential weight to halve
     """
     assert N >= 1, 'number of weights must be >= 1; given N='+str(N)
-    assert scheme in ['constant', 'linear'], 'invalid scale='+str(scale)
+    assert scheme in ['constant', 'linear', 'exponential'], 'invalid scheme='+str(scheme)
     
     if scheme == 'constant':
         weights = [1.0/N for i in range(N)]
@@ -26,6 +42,12 @@ def get_weights(N, scheme='constant'):
         sum_values = float(sum(values))
         weights = [v/sum_values for v in values]
         
+    elif scheme == 'exponential':
+        assert halflife > 0, 'halflife must be > 0; given halflife='+str(halflife)
+        values = [0.5**((N-1-i)/float(halflife)) for i in range(N)]
+        sum_values = sum(values)
+        weights = [v/sum_values for v in values]
+        
     return weights
 
 
@@ -38,80 +60,164 @@ def scale_feature(feature):
     params:
             list[float] | feature to be scaled
     """
-    mean = sum(feature) / float(len(feature))
-    
-    distance = float(max(feature) - min(feature))
-    
-    scaled_feature = [(x-mean)/distance for x in feature]
-    
-    return scaled_feature
+    return Scaler(span='full').fit_transform(feature).ravel().tolist()
 
 
-def scale_features(features, feature_names):
+def scale_features(features, feature_names, scaler=None):
     """
+    Feature scaling (subtracting mean and dividing by range)
+    of all given features in one vectorized pass
+    
     return: dataframe | scaled features dataframe
     
     params:
            features: dataframe    | original unscaled features
       feature_names: list[string] | list of features to scale
+             scaler: Scaler       | fitted Scaler to reuse (e.g. at
+                                    prediction time); an unfitted one
+                                    is fitted here (default=None, a
+                                    new one with span='full')
     """
-    for f in feature_names:
-        features[f] = scale_feature(features[f].values)
+    if scaler is None:
+        scaler = Scaler(span='full')
+    if not scaler.fitted():
+        scaler.fit(features, feature_names)
+    
+    values = scaler.transform(features[feature_names].values, feature_names)
+    
+    for j, f in enumerate(feature_names):
+        features[f] = values[:, j]
     return features
 
 
-def makePlots(feature, results, nbins=100):
+def feature_histograms(features, outcomes, nbins=100, ranges=None, classes=None):
     """
+    Bin many features against game outcomes in one vectorized pass
+    (a single np.bincount over feature x bin x outcome group); bins
+    match numpy.histogram over each feature's range
+    
+    return: dict[string:np.array] | 'groups': outcome group labels (G)
+                                    'edges':  bin edges (k x nbins+1)
+                                    'counts': games per bin and group (k x nbins x G)
+                                    'totals': games per bin (k x nbins)
+                                    'rates':  counts/totals, the conditional
+                                              outcome rates (NaN for empty bins)
+                                    'missing': games left out for a missing
+                                               (NaN) outcome
+    params:
+       features: np.array/dataframe | games x k features (or one feature)
+       outcomes: np.array           | outcome per game, e.g. diff_score()
+                                      or numerical_result()
+          nbins: int                | number of bins per feature
+         ranges: list[tuple]        | (min, max) per feature (default=the
+                                      feature's own min and max)
+        classes: list               | outcome values, one group each
+                                      (default=None, groups by sign:
+                                      away (<0), tie (0), home (>0))
     """
     import numpy
     
-    allpdS, home, away, tie = [], [], [], []
+    X = numpy.asarray(features, dtype=numpy.float64)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    n, k = X.shape
     
-    for i, f in enumerate(feature):
-        if   results[i] == 0: tie.append(f)
-        elif results[i]  > 0: home.append(f)
-        elif results[i]  < 0: away.append(f)
-        allpdS.append(f)
-        
-    # Create histograms for all, favor, upset, and tie
-    aHist = numpy.histogram(numpy.array(allpdS), bins=nbins,normed=False,range=(min(allpdS),max(allpdS)))
-    hHist = numpy.histogram(numpy.array(home), bins=nbins,normed=False,range=(min(allpdS),max(allpdS)))
-    vHist = numpy.histogram(numpy.array(away), bins=nbins,normed=False,range=(min(allpdS),max(allpdS)))
-    tHist = numpy.histogram(numpy.array(tie),  bins=nbins,normed=False,range=(min(allpdS),max(allpdS)))
-    
-    ax, vx, hx, tx = aHist[1], vHist[1], hHist[1], tHist[1]
-    ay, vy, hy, ty = aHist[0], vHist[0], hHist[0], tHist[0]
-    
-    # Scale the histograms by event occurence
-    a, v, h, t = list(ay), list(vy), list(hy), list(ty)
-    for i in range(len(ay)):
-        
-        if ay[i] != 0:
-            v_scale = float(vy[i]) / float(ay[i])
-            h_scale = float(hy[i]) / float(ay[i])
-            t_scale = float(ty[i]) / float(ay[i])
-            
-            v[i] = v_scale
-            h[i] = h_scale
-            t[i] = t_scale
-            
-    # Write histogram for visitors (away)
-    out = open('away.hist','w')
-    for i in range(len(v)):
-        if ay[i] > 0:  # don't write if this value of dP has never occured
-            out.write(str(vx[i])+' '+str(v[i])+'\n')
-    out.close()
-    
-    # Write histogram for home
-    out = open('home.hist','w')
-    for i in range(len(h)):
-        if ay[i] > 0:  # don't write if this value of dP has never occured
-            out.write(str(hx[i])+' '+str(h[i])+'\n')
-    out.close()
-    
-    # Write histogram for ties
-    out = open('tie.hist','w')
-    for i in range(len(t)):
-        if ay[i] > 0:  # don't write if this value of dP has never occured
-            out.write(str(tx[i])+' '+str(t[i])+'\n')
-    out.close()
+    outcomes = numpy.asarray(outcomes)
+    assert len(outcomes) == n, 'outcomes has '+str(len(outcomes))+' rows, expected '+str(n)
+    
+    # NaN is the only value not equal to itself
+    missing = outcomes != outcomes
+    
+    # outcome group of every game (-1 = none of the classes, or missing)
+    if classes is None:
+        groups = ['away', 'tie', 'home']
+        group  = numpy.sign(numpy.where(missing, 0, outcomes)).astype(numpy.int64) + 1
+    else:
+        groups = list(classes)
+        group  = numpy.full(n, -1, dtype=numpy.int64)
+        for i, c in enumerate(classes):
+            group[outcomes == c] = i
+    group[missing] = -1
+    G = len(groups)
+    
+    # per-feature ranges (widened like numpy.histogram when empty)
+    if ranges is None:
+        lo, hi = numpy.nanmin(X, axis=0), numpy.nanmax(X, axis=0)
+    else:
+        lo = numpy.array([r[0] for r in ranges], dtype=numpy.float64)
+        hi = numpy.array([r[1] for r in ranges], dtype=numpy.float64)
+    same = lo == hi
+    lo, hi = numpy.where(same, lo-0.5, lo), numpy.where(same, hi+0.5, hi)
+    
+    edges = numpy.array([numpy.linspace(l, h, nbins+1) for l, h in zip(lo, hi)])
+    
+    # bin index of every value, as numpy.histogram computes it
+    with numpy.errstate(invalid='ignore'):
+        valid = (X >= lo) & (X <= hi) & (group >= 0)[:, None]
+        index = ((X - lo) * (nbins / (hi - lo))).astype(numpy.int64)
+    index = numpy.where(valid, index, 0)
+    index[index == nbins] -= 1
+    
+    columns = numpy.arange(k)[None, :].repeat(n, axis=0)
+    with numpy.errstate(invalid='ignore'):
+        index[valid & (X < edges[columns, index])] -= 1
+        index[valid & (X >= edges[columns, index+1]) & (index != nbins-1)] += 1
+    
+    # one bincount over (feature, bin, group)
+    keys = (columns*nbins + index)*G + group[:, None]
+    counts = numpy.bincount(keys[valid], minlength=k*nbins*G).reshape(k, nbins, G)
+    totals = counts.sum(axis=2)
+    
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        rates = numpy.where(totals[:, :, None] > 0, counts / totals[:, :, None].astype(numpy.float64), numpy.nan)
+    
+    return {'groups': numpy.array(groups), 'edges': edges,
+            'counts': counts, 'totals': totals, 'rates': rates,
+            'missing': int(missing.sum())}
+
+
+def save_histograms(histograms, path, feature_names=None):
+    """
+    Write feature_histograms() output as compressed NumPy columns
+    
+    params:
+         histograms: dict[string:np.array] | feature_histograms() output
+               path: string                | .npz file to write
+      feature_names: list[string]          | name of each feature
+    """
+    import numpy
+    
+    arrays = dict(histograms)
+    if feature_names is not None:
+        arrays['feature_names'] = numpy.array(feature_names)
+    
+    numpy.savez_compressed(path, **arrays)
+
+
+def makePlots(feature, results, nbins=100, path=None):
+    """
+    Write the away/home/tie rates per bin of a feature
+    (bins never seen are skipped) to away.hist, home.hist
+    and tie.hist
+    
+    params:
+       feature: list[float] | feature value of each game
+       results: list[int]   | result of each game (sign: home/away/tie)
+         nbins: int         | number of bins
+          path: string      | also save the histograms as .npz (optional)
+    """
+    histograms = feature_histograms(feature, results, nbins=nbins)
+    
+    if path:
+        save_histograms(histograms, path)
+    
+    edges  = histograms['edges'][0]
+    totals = histograms['totals'][0]
+    rates  = histograms['rates'][0]
+    
+    for name, g in [('away', 0), ('home', 2), ('tie', 1)]:
+        out = open(name+'.hist','w')
+        for i in range(nbins):
+            if totals[i] > 0:  # don't write if this value of dP has never occured
+                out.write(str(edges[i])+' '+str(float(rates[i, g]))+'\n')
+        out.close()